@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
-import argparse, os, re, pandas as pd
+import argparse, csv, os, re
+try:
+    import re2  # optional (pip install google-re2): DFA prefilter for the diff checks
+except ImportError:
+    re2 = None
 
 # ----- thresholds you can tune
 MIN_STRONG_SCORE = 6       # classification score >= this => trust classifier (no suspect)
@@ -9,65 +13,105 @@ DELTA_ALLOW = 2            # if classifier score is within DELTA of a hinted cat
 
 def rx(p, flags=re.I): return re.compile(p, flags)
 
+# RE2 prefilters for the diff patterns (only with re2 installed). RE2's \b is
+# ASCII-only and its (?i) doesn't fold i to Turkish İ/ı as re.I does, so it
+# never decides a match: with the \b's dropped and i widened to [iİı] it accepts
+# a superset in one DFA pass, and the stdlib pattern confirms the hits.
+DIFF_PREFILTERS = {}
+
+def diff_rx(p):
+    pat = rx(p)
+    if re2 is not None and p.isascii():
+        DIFF_PREFILTERS[pat] = re2.compile("(?i)" + p.replace(r"\b", "").replace("i", "[iİı]"))
+    return pat
+
+def diff_search(pat, text):
+    pre = DIFF_PREFILTERS.get(pat)
+    return (pre is None or pre.search(text) is not None) and pat.search(text) is not None
+
 # High-precision message hints per category (NO generic words here)
 MSG_HINTS = {
-    "Documentation / Formatting": rx(r"\b(readme|vignette|roxygen|pkgdown|docs?|heading|typo|spelling|grammar|man page|news)\b"),
-    "Rendering / Conversion":     rx(r"\b(render|knit|quarto|pandoc|latex|compile|build site)\b"),
-    "Dependency / Package":       rx(r"\b(dependency|namespace|import|install|cran|r cmd check)\b"),
-    "Visualization / Plotting":   rx(r"\b(ggplot|legend|axis|figure|theme|facet)\b"),
-    "Data / Input Handling":      rx(r"\b(read\s|load|parse|input|csv|tsv|missing data)\b"),
-    "Environment / Configuration":rx(r"\b(config|yaml|path|environment|option|workflow|ci)\b"),
-    "File I/O and Export":        rx(r"\b(write\.?csv|write(file|lines)?|save(rds| image)?|export|ggsave)\b"),
-    "Implementation / Logic":     rx(r"\b(argument|index|subset|logic|na\b|null\b|trycatch|stop\()"),
+    "Documentation / Formatting": rx(r"\b(?:readme|vignette|roxygen|pkgdown|docs?|heading|typo|spelling|grammar|man page|news)\b"),
+    "Rendering / Conversion":     rx(r"\b(?:render|knit|quarto|pandoc|latex|compile|build site)\b"),
+    "Dependency / Package":       rx(r"\b(?:dependency|namespace|import|install|cran|r cmd check)\b"),
+    "Visualization / Plotting":   rx(r"\b(?:ggplot|legend|axis|figure|theme|facet)\b"),
+    "Data / Input Handling":      rx(r"\b(?:read\s|load|parse|input|csv|tsv|missing data)\b"),
+    "Environment / Configuration":rx(r"\b(?:config|yaml|path|environment|option|workflow|ci)\b"),
+    "File I/O and Export":        rx(r"\b(?:write\.?csv|write(?:file|lines)?|save(?:rds| image)?|export|ggsave)\b"),
+    "Implementation / Logic":     rx(r"\b(?:argument|index|subset|logic|na\b|null\b|trycatch|stop\()"),
 }
 
 # Generic words that should NOT trigger a suspect by themselves
-GENERIC = rx(r"\b(fix|fixed|fixes|update|minor|misc|refactor|cleanup|improve|adjust|change|tweak|polish)\b")
+GENERIC = rx(r"\b(?:fix|fixed|fixes|update|minor|misc|refactor|cleanup|improve|adjust|change|tweak|polish)\b")
 
 # Minimal diff/path patterns to decide if the classifier had strong evidence
+# (path_pat, diff_pat); None where a category has no pattern on that side
 DIFF_PATH = {
     "Documentation / Formatting": (
-        rx(r"(?:^|[/\\])(readme(?:\.r?md)?|vignettes|man|pkgdown|inst[/\\]doc|docs|news\.md)(?:[/\\]|$)"),
-        rx(r"\b(readme|pkgdown|vignette|roxygen|typo|spelling|grammar)\b"),
+        rx(r"(?:^|[/\\])(?:readme(?:\.r?md)?|vignettes|man|pkgdown|inst[/\\]doc|docs|news\.md)(?:[/\\]|$)"),
+        diff_rx(r"\b(?:readme|pkgdown|vignette|roxygen|typo|spelling|grammar)\b"),
     ),
     "Rendering / Conversion": (
         rx(r"(?:\.rmd|\.qmd|_output\.yml|_site\.yml|bookdown\.yml)$"),
-        rx(r"\b(rmarkdown::render|knit|quarto|pandoc|latex|compile)\b"),
+        diff_rx(r"\b(?:rmarkdown::render|knit|quarto|pandoc|latex|compile)\b"),
     ),
     "Dependency / Package": (
-        rx(r"(?:^|[/\\])(DESCRIPTION|NAMESPACE|renv\.lock)(?:$|[/\\])"),
-        rx(r"\b(library\(|require\(|install\.packages|::)\b"),
+        rx(r"(?:^|[/\\])(?:DESCRIPTION|NAMESPACE|renv\.lock)(?:$|[/\\])"),
+        diff_rx(r"\b(?:library\(|require\(|install\.packages|::)\b"),
     ),
-    "Visualization / Plotting": (rx(r""), rx(r"\b(ggplot2?::ggplot|ggplot\(|geom_|aes\()")),
-    "Data / Input Handling":     (rx(r""), rx(r"\b(read\.csv|readr::read_|fread\(|fromJSON|readRDS)\b")),
-    "Environment / Configuration":(rx(r"(?:^|[/\\])(\.Rprofile|\.Renviron|\.github[/\\]workflows)(?:$|[/\\])"), rx(r"")),
-    "File I/O and Export":        (rx(r""), rx(r"\b(write\.csv|writeLines|saveRDS|ggsave|export)\b")),
-    "Implementation / Logic":     (rx(r""), rx(r"")),
-    "Reproducibility / Versioning":(rx(r"(?:^|[/\\])(renv\.lock|DESCRIPTION)(?:$|[/\\])"), rx(r"\b(set\.seed|sessionInfo\(\)|renv::(snapshot|restore))\b")),
-    "Miscellaneous / Unknown":    (rx(r""), rx(r"")),
+    "Visualization / Plotting": (None, diff_rx(r"\b(?:ggplot2?::ggplot|ggplot\(|geom_|aes\()")),
+    "Data / Input Handling":     (None, diff_rx(r"\b(?:read\.csv|readr::read_|fread\(|fromJSON|readRDS)\b")),
+    "Environment / Configuration":(rx(r"(?:^|[/\\])(?:\.Rprofile|\.Renviron|\.github[/\\]workflows)(?:$|[/\\])"), None),
+    "File I/O and Export":        (None, diff_rx(r"\b(?:write\.csv|writeLines|saveRDS|ggsave|export)\b")),
+    "Implementation / Logic":     (None, None),
+    "Reproducibility / Versioning":(rx(r"(?:^|[/\\])(?:renv\.lock|DESCRIPTION)(?:$|[/\\])"), diff_rx(r"\b(?:set\.seed|sessionInfo\(\)|renv::(?:snapshot|restore))\b")),
+    "Miscellaneous / Unknown":    (None, None),
 }
 
-def strong_msg_category(msg):
-    m = str(msg or "")
-    cats = [c for c, pat in MSG_HINTS.items() if pat.search(m)]
-    if not cats: return None
-    # prefer more specific categories first
-    order = ["Documentation / Formatting","Rendering / Conversion","Visualization / Plotting",
-             "Data / Input Handling","Dependency / Package","Environment / Configuration",
-             "File I/O and Export","Reproducibility / Versioning","Implementation / Logic"]
-    cats.sort(key=lambda c: order.index(c))
-    return cats[0]
+# prefer more specific categories first
+MSG_PRIORITY = ["Documentation / Formatting","Rendering / Conversion","Visualization / Plotting",
+                "Data / Input Handling","Dependency / Package","Environment / Configuration",
+                "File I/O and Export","Reproducibility / Versioning","Implementation / Logic"]
+
+def slug(cat): return re.sub(r"\W+", "_", cat).strip("_").lower()
+
+# All hints fused into one alternation, compiled once. The lookahead makes
+# finditer test every position, so overlapping hits (e.g. "write.csv" is both
+# File I/O and Data) are still seen and MSG_PRIORITY decides, as before.
+# GENERIC rides along as the last alternative, so one scan answers both checks.
+MSG_UNION = rx("(?=" + "|".join(f"(?P<{slug(c)}>{MSG_HINTS[c].pattern})"
+                                 for c in MSG_PRIORITY if c in MSG_HINTS)
+               + f"|(?P<generic>{GENERIC.pattern}))")
+# plain any-hint alternation (no lookahead/groups) used as a cheap prefilter
+MSG_ANY = rx("|".join(f"(?:{MSG_HINTS[c].pattern})" for c in MSG_PRIORITY if c in MSG_HINTS))
+MSG_GROUPS = {slug(c): c for c in MSG_HINTS}
+MSG_RANK = {c: i for i, c in enumerate(MSG_PRIORITY)}
+
+def msg_signals(msg: str):
+    # -> (strongest hint category or None, has a GENERIC word); callers pass
+    # str(msg or ""). The generic flag only matters without a hint.
+    best, generic = None, False
+    for m in MSG_UNION.finditer(msg):
+        if m.lastgroup == "generic":
+            generic = True; continue
+        cat = MSG_GROUPS[m.lastgroup]
+        if best is None or MSG_RANK[cat] < MSG_RANK[best]:
+            best = cat
+            if MSG_RANK[best] == 0: break
+    return best, generic
+
+def strong_msg_category(msg: str): return msg_signals(msg)[0]
 
 def classifier_has_strong_evidence(cat, diff_text, filenames):
-    path_pat, diff_pat = DIFF_PATH.get(cat, (rx(r""), rx(r"")))
+    path_pat, diff_pat = DIFF_PATH.get(cat, (None, None))
     files = (filenames or "").lower()
     diff  = diff_text or ""
-    if path_pat.pattern and path_pat.search(files): return True
-    if diff_pat.pattern and diff_pat.search(diff):  return True
+    if path_pat and path_pat.search(files): return True
+    if diff_pat and diff_search(diff_pat, diff): return True
     return False
 
-def detect_columns(df):
-    lc = {c.lower(): c for c in df.columns}
+def detect_columns(columns):
+    lc = {c.lower(): c for c in columns}
     def pick(cands):
         for k in cands:
             if k in lc: return lc[k]
@@ -81,55 +125,133 @@ def detect_columns(df):
         "sha":       pick(["commit_hash","sha","hash","commit"]),
     }
 
-def run(classified_csv, out_csv):
-    df = pd.read_csv(classified_csv)
-    cols = detect_columns(df)
+def read_header(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+def audit_columns(classified_csv):
+    # detect on the header only, so callers can parse just the columns the audit uses
+    cols = detect_columns(read_header(classified_csv))
+    return [c for c in cols.values() if c]
+
+OUT_COLUMNS = ["commit_hash","message","assigned_category","category_score","message_hint_category"]
+
+def write_suspects(rows, out_csv):
+    with open(out_csv, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator=os.linesep)
+        w.writerow(OUT_COLUMNS)
+        w.writerows(rows)
+    print(f"Suspects written: {len(rows)} -> {out_csv}")
+
+def run_stream(classified_csv, out_csv):
+    # Row-at-a-time audit on the csv module: the default for one-off CLI runs,
+    # where importing pandas costs more than auditing a typical repo.
+    csv.field_size_limit(2**31 - 1)   # diffs can exceed the 128 KiB default
+    with open(classified_csv, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        cols = detect_columns(reader.fieldnames or [])
+        for need in ["msg","cat","score"]:
+            if not cols[need]:
+                raise SystemExit(f"Missing required column: {need}")
+        rows = []
+        for r in reader:
+            get = lambda k: (r.get(cols[k]) or "") if cols[k] else ""
+            msg, cat, raw = get("msg"), get("cat"), get("score")
+            try:
+                score = float(raw)
+            except ValueError:
+                score = float("nan")
+            if score >= MIN_STRONG_SCORE: continue                    # 1
+            hint, generic = msg_signals(msg)
+            if REQUIRE_MSG_STRONG and hint is None: continue          # 2
+            if IGNORE_GENERIC and hint is None and generic: continue  # 3
+            if classifier_has_strong_evidence(cat, get("diff"), get("filenames")): continue  # 4
+            if hint is not None and hint == cat: continue             # 5
+            if score >= max(MIN_STRONG_SCORE - DELTA_ALLOW, 0): continue  # 6
+            rows.append([get("sha"), msg, cat, raw, hint or ""])
+    write_suspects(rows, out_csv)
+
+def run(classified_csv, out_csv, df=None):
+    # Vectorized audit (--fast, and what batch QC calls in-process).
+    # df: the already-parsed classified table, if the caller has one (batch QC)
+    import numpy as np, pandas as pd
+
+    def contains(s, pat):
+        # RE2 prefilter (if any) picks the candidate rows, the stdlib pattern confirms them
+        pre = DIFF_PREFILTERS.get(pat)
+        if pre is None: return s.str.contains(pat).to_numpy()
+        hit = np.fromiter((pre.search(x) is not None for x in s), dtype=bool, count=len(s))
+        if hit.any(): hit[hit] = s[hit].str.contains(pat).to_numpy()
+        return hit
+
+    if df is None:
+        df = pd.read_csv(classified_csv, usecols=audit_columns(classified_csv))
+    cols = detect_columns(df.columns)
     for need in ["msg","cat","score"]:
         if not cols[need]:
             raise SystemExit(f"Missing required column: {need}")
 
-    suspects = []
-    for _, r in df.iterrows():
-        msg   = r.get(cols["msg"], "")
-        cat   = r.get(cols["cat"], "")
-        score = pd.to_numeric(r.get(cols["score"]), errors="coerce")
-        diff  = r.get(cols["diff"], "")
-        files = r.get(cols["filenames"], "")
-
-        # 1) strong classifier? -> never suspect
-        if pd.notna(score) and score >= MIN_STRONG_SCORE:
-            continue
-
-        # 2) strong message hint?
-        msg_cat = strong_msg_category(msg)
-        if REQUIRE_MSG_STRONG and not msg_cat:
-            continue
-
-        # 3) ignore purely generic messages
-        if IGNORE_GENERIC and (GENERIC.search(str(msg)) and not msg_cat):
-            continue
-
-        # 4) if classifier has strong path/diff evidence -> trust it
-        if classifier_has_strong_evidence(cat, diff, files):
-            continue
-
-        # 5) if message cat equals classifier -> not suspect
-        if msg_cat and msg_cat == cat:
-            continue
-
-        # 6) optional small margin: if classifier score is close enough, keep it
-        if pd.notna(score) and score >= max(MIN_STRONG_SCORE - DELTA_ALLOW, 0):
-            continue
-
-        suspects.append({
-            "commit_hash": r.get(cols["sha"]),
-            "message": msg,
-            "assigned_category": cat,
-            "category_score": score,
-            "message_hint_category": msg_cat,
-        })
-
-    out_df = pd.DataFrame(suspects)
+    def text(key):
+        if not cols[key]: return pd.Series("", index=df.index)
+        return df[cols[key]].fillna("").astype(str)
+
+    # Whole-column views; every rule below is a boolean mask over all commits
+    msg   = text("msg")
+    cat   = df[cols["cat"]]
+    score = pd.to_numeric(df[cols["score"]], errors="coerce").to_numpy()
+    strong = score >= MIN_STRONG_SCORE                           # NaN -> False
+    close  = score >= max(MIN_STRONG_SCORE - DELTA_ALLOW, 0)
+    diff  = text("diff")
+    files = text("filenames").str.lower()
+
+    # strongest message hint per commit (first hit in MSG_PRIORITY wins)
+    # most messages carry no hint at all: one pass of MSG_ANY rejects them, and
+    # only the survivors are tested against each category's pattern
+    hinted = [c for c in MSG_PRIORITY if c in MSG_HINTS]
+    has_hint = msg.str.contains(MSG_ANY).to_numpy()
+    hit_msgs = msg[has_hint]
+    hint_masks = []
+    for c in hinted:
+        m = np.zeros(len(df), dtype=bool)
+        m[has_hint] = hit_msgs.str.contains(MSG_HINTS[c]).to_numpy()
+        hint_masks.append(m)
+    msg_cat = np.select(hint_masks, hinted, default=None).astype(object)
+
+    # classifier evidence: only the assigned category's path/diff patterns count
+    evidence = np.zeros(len(df), dtype=bool)
+    for c, (path_pat, diff_pat) in DIFF_PATH.items():
+        if path_pat is None and diff_pat is None: continue
+        sel = (cat == c).to_numpy()
+        if not sel.any(): continue
+        hit = np.zeros(int(sel.sum()), dtype=bool)
+        if path_pat: hit |= files[sel].str.contains(path_pat).to_numpy()
+        if diff_pat: hit |= contains(diff[sel], diff_pat)
+        evidence[sel] = hit
+
+    # 1) strong classifier? -> never suspect
+    mask = ~strong
+    # 2) strong message hint?
+    if REQUIRE_MSG_STRONG:
+        mask &= has_hint
+    # 3) ignore purely generic messages
+    if IGNORE_GENERIC:
+        rest = mask & ~has_hint   # only hint-less rows still in play need the scan
+        if rest.any(): mask[rest] = ~msg[rest].str.contains(GENERIC).to_numpy()
+    # 4) if classifier has strong path/diff evidence -> trust it
+    mask &= ~evidence
+    # 5) if message cat equals classifier -> not suspect
+    mask &= ~(has_hint & (msg_cat == cat.to_numpy()))
+    # 6) optional small margin: if classifier score is close enough, keep it
+    mask &= ~close
+
+    # build the output straight from the column arrays
+    out_df = pd.DataFrame({
+        "commit_hash": df[cols["sha"]].to_numpy()[mask] if cols["sha"] else None,
+        "message": df[cols["msg"]].to_numpy()[mask],
+        "assigned_category": cat.to_numpy()[mask],
+        "category_score": score[mask],
+        "message_hint_category": msg_cat[mask],
+    })
     out_df.to_csv(out_csv, index=False)
     print(f"Suspects written: {len(out_df)} -> {out_csv}")
 
@@ -139,6 +261,7 @@ if __name__ == "__main__":
     src.add_argument("--classified", help="Path to *_classified.csv")
     src.add_argument("--base", help="Prefix without .csv (e.g., data_bug\\repo\\repo_classified)")
     ap.add_argument("--out", help="Output CSV (default: <base>_suspect_relabels.csv)")
+    ap.add_argument("--fast", action="store_true", help="Vectorized pandas audit (quicker on large repos)")
     args = ap.parse_args()
 
     if args.base:
@@ -149,4 +272,4 @@ if __name__ == "__main__":
         b, _ = os.path.splitext(classified)
         out = args.out or b + "_suspect_relabels.csv"
 
-    run(classified, out)
+    (run if args.fast else run_stream)(classified, out)
@@ -1,5 +1,12 @@
 #!/usr/bin/env python3
-import os, sys, argparse, subprocess, pandas as pd, traceback
+import os, sys, io, csv, argparse, subprocess, contextlib, pandas as pd, traceback
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+try:  # sibling script; reuse the already-loaded pandas/regexes instead of a new interpreter
+    from audit_one_repo import run as audit_run, audit_columns
+except ImportError:
+    audit_run = audit_columns = None
 
 COVERAGE_MIN = 0.85
 LOWCONF_MAX  = 0.15
@@ -7,33 +14,65 @@ UNKNOWN_MAX  = 0.10
 SUSPECT_WARN = 0.02
 SUSPECT_MAX  = 0.10
 
+# reason templates and the limit each shows; rendered only for WARN/FAIL repos
+REASONS = {
+    "unknown":       ("Unknown {:.1f}% > {:.0f}%",  UNKNOWN_MAX*100),
+    "coverage":      ("Coverage {:.1%} < {:.0%}",   COVERAGE_MIN),
+    "lowconf":       ("LowConf {:.1%} > {:.0%}",    LOWCONF_MAX),
+    "suspects":      ("Suspects {:.1f}% > {:.0f}%", SUSPECT_MAX*100),
+    "suspects_warn": ("Suspects {:.1f}% > {:.0f}%", SUSPECT_WARN*100),
+}
+
 def find_classified_csvs(data_dir: str):
-    out = []
-    for root, _, files in os.walk(data_dir):
-        for f in files:
-            if f.endswith("_classified.csv"):
-                out.append(os.path.join(root, f))
-    return sorted(out)
-
-def ensure_percentages(classified_csv: str, base_prefix: str):
+    # lazy DFS over the data dir; callers sort if they need a stable order
+    stack = [data_dir]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.endswith("_classified.csv"):
+                    yield e.path
+
+QC_COLUMNS = ("bug_category", "category_score")
+
+def load_classified(classified_csv: str, with_audit: bool = False):
+    # QC only needs the label and score; skipping message/diff/filenames
+    # avoids parsing the bulk of the file. When the audit still has to run,
+    # its columns are parsed in the same pass and the frame is handed to it.
+    # The label is a ~10-value enum, so categorical codes make the group-by
+    # below an integer bincount.
+    keep = set(QC_COLUMNS)
+    if with_audit:
+        keep.update(audit_columns(classified_csv))
+    return pd.read_csv(classified_csv, usecols=lambda c: c in keep,
+                       dtype={"bug_category": "category"})
+
+def ensure_percentages(df: pd.DataFrame, base_prefix: str):
     pct_path = base_prefix + "_category_percentages.csv"
     if os.path.exists(pct_path):
-        return pct_path
-    df = pd.read_csv(classified_csv)
-    grp = df.groupby("bug_category", as_index=False)
-    pct = grp.size().rename(columns={"size":"count"})
-    pct["percent"] = (pct["count"]/len(df)*100).round(1)
+        return pd.read_csv(pct_path)
+    # count and median in one grouped pass (no second groupby + merge)
+    aggs = {"count": ("bug_category", "size")}
     if "category_score" in df.columns:
-        med = grp["category_score"].median()
-        pct = pct.merge(med, on="bug_category", how="left").rename(columns={"category_score":"median_score"})
+        aggs["median_score"] = ("category_score", "median")
+    pct = df.groupby("bug_category", as_index=False, observed=True).agg(**aggs)
+    pct.insert(2, "percent", (pct["count"]/len(df)*100).round(1))
     pct = pct.sort_values("count", ascending=False)
     pct.to_csv(pct_path, index=False)
-    return pct_path
+    return pct
 
-def run_audit_if_missing(base_prefix: str, scripts_dir: str):
+def run_audit_if_missing(base_prefix: str, scripts_dir: str, df=None):
     sus_path = base_prefix + "_suspect_relabels.csv"
     if os.path.exists(sus_path):
         return sus_path
+    if audit_run is not None:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                audit_run(base_prefix + ".csv", sus_path, df=df)
+        except (Exception, SystemExit):
+            pass
+        return sus_path
     audit_py = os.path.join(scripts_dir, "audit_one_repo.py")
     if not os.path.exists(audit_py):
         return sus_path
@@ -44,8 +83,13 @@ def run_audit_if_missing(base_prefix: str, scripts_dir: str):
         pass
     return sus_path
 
-def coverage_lowconf(classified_csv: str):
-    df = pd.read_csv(classified_csv)
+def count_rows(path: str):
+    # data rows only; csv.reader keeps quoted multi-line messages as one record,
+    # so this matches len(pd.read_csv(path)) without building a DataFrame
+    with open(path, newline="", encoding="utf-8") as f:
+        return max(sum(1 for row in csv.reader(f) if row) - 1, 0)
+
+def coverage_lowconf(df: pd.DataFrame):
     s = pd.to_numeric(df.get("category_score"), errors="coerce")
     cov = float((s > 0).mean()) if len(s) else float("nan")
     low = float((s <= 2).mean()) if len(s) else float("nan")
@@ -53,36 +97,38 @@ def coverage_lowconf(classified_csv: str):
 
 def qc_one(classified_csv: str, scripts_dir: str):
     base_prefix, _ = os.path.splitext(classified_csv)
-    pct_csv = ensure_percentages(classified_csv, base_prefix)
+    # one parse serves percentages, coverage and (if still missing) the audit
+    need_audit = audit_run is not None and not os.path.exists(base_prefix + "_suspect_relabels.csv")
+    df = load_classified(classified_csv, with_audit=need_audit)
+    pct = ensure_percentages(df, base_prefix)
 
-    pct = pd.read_csv(pct_csv)
     n_commits = int(pd.to_numeric(pct["count"], errors="coerce").sum())
     unknown_pct = float(
         pct.loc[pct["bug_category"].str.contains("Unknown", case=False, na=False), "percent"].sum()
     ) if "percent" in pct.columns else 0.0
 
-    sus_csv = run_audit_if_missing(base_prefix, scripts_dir)
+    sus_csv = run_audit_if_missing(base_prefix, scripts_dir, df if need_audit else None)
     suspects = 0
     if os.path.exists(sus_csv):
         try:
-            suspects = len(pd.read_csv(sus_csv))
+            suspects = count_rows(sus_csv)
         except Exception:
             suspects = 0
     suspect_rate = (suspects / n_commits) if n_commits else 0.0
 
-    cov, low, _ = coverage_lowconf(classified_csv)
+    cov, low, _ = coverage_lowconf(df)
 
-    status, reasons = "PASS", []
-    if unknown_pct/100.0 > UNKNOWN_MAX:
-        status = "FAIL"; reasons.append(f"Unknown {unknown_pct:.1f}% > {UNKNOWN_MAX*100:.0f}%")
-    if cov < COVERAGE_MIN:
-        status = "FAIL"; reasons.append(f"Coverage {cov:.1%} < {COVERAGE_MIN:.0%}")
-    if low > LOWCONF_MAX:
-        status = "FAIL"; reasons.append(f"LowConf {low:.1%} > {LOWCONF_MAX:.0%}")
-    if suspect_rate > SUSPECT_MAX:
-        status = "FAIL"; reasons.append(f"Suspects {suspect_rate*100:.1f}% > {SUSPECT_MAX*100:.0f}%")
-    elif suspect_rate > SUSPECT_WARN and status != "FAIL":
-        status = "WARN"; reasons.append(f"Suspects {suspect_rate*100:.1f}% > {SUSPECT_WARN*100:.0f}%")
+    # decide on the raw numbers; reason strings are only formatted if something tripped
+    values = {"unknown": unknown_pct, "coverage": cov, "lowconf": low,
+              "suspects": suspect_rate*100, "suspects_warn": suspect_rate*100}
+    tripped = [k for k, bad in (("unknown", unknown_pct/100.0 > UNKNOWN_MAX),
+                                ("coverage", cov < COVERAGE_MIN),
+                                ("lowconf", low > LOWCONF_MAX),
+                                ("suspects", suspect_rate > SUSPECT_MAX)) if bad]
+    status = "FAIL" if tripped else "PASS"
+    if not tripped and suspect_rate > SUSPECT_WARN:
+        status, tripped = "WARN", ["suspects_warn"]
+    reasons = [REASONS[k][0].format(values[k], REASONS[k][1]) for k in tripped]
 
     repo_tag = os.path.basename(base_prefix)
     return {
@@ -97,29 +143,46 @@ def qc_one(classified_csv: str, scripts_dir: str):
         "base": base_prefix
     }
 
+def qc_task(classified_csv: str, scripts_dir: str):
+    # Worker entry point: report failures as data so one bad repo doesn't stop the pool
+    try:
+        return qc_one(classified_csv, scripts_dir), None
+    except Exception as e:
+        return None, (str(e), traceback.format_exc())
+
 def main():
     ap = argparse.ArgumentParser(description="Batch QC across all repos.")
     ap.add_argument("--data-dir", default="data_bug", help="Folder containing per-repo subfolders")
-    ap.add_argument("--scripts-dir", default="scripts", help="Folder containing audit_one_repo.py")
+    ap.add_argument("--scripts-dir", default="scripts", help="Folder containing audit_one_repo.py (subprocess fallback if it can't be imported)")
     ap.add_argument("--out", default="analysis/qc_summary.csv", help="Summary CSV output")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Worker processes; N > 1 checks N repos at once (default: 1 = serial)")
     args = ap.parse_args()
 
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
     rows, errors = [], []
 
-    classified_files = find_classified_csvs(args.data_dir)
+    classified_files = sorted(find_classified_csvs(args.data_dir))
     if not classified_files:
         print(f"No *_classified.csv files found under {args.data_dir}")
         sys.exit(1)
 
-    for cfile in classified_files:
-        try:
-            rows.append(qc_one(cfile, args.scripts_dir))
-        except Exception as e:
-            tb = traceback.format_exc()
-            errors.append({"classified_csv": cfile, "error": str(e)})
-            print(f"[QC-SKIP] {cfile}: {e}")
-            print(tb)
+    if args.jobs <= 1:
+        results = map(qc_task, classified_files, repeat(args.scripts_dir))
+    else:
+        # one repo per task
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            # map() yields in input order, so ties in the final sort stay reproducible
+            results = list(pool.map(qc_task, classified_files, repeat(args.scripts_dir)))
+
+    for cfile, (row, err) in zip(classified_files, results):
+        if err is None:
+            rows.append(row)
+            continue
+        msg, tb = err
+        errors.append({"classified_csv": cfile, "error": msg})
+        print(f"[QC-SKIP] {cfile}: {msg}")
+        print(tb)
 
     df = pd.DataFrame(rows)
     if not df.empty:
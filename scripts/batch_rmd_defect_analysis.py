@@ -11,15 +11,29 @@ Improvements:
   * <repo>_r_touch_by_category.csv
   * <repo>_top_paths.csv
 - Detects touches_r / touches_rmd from columns or infers from filenames.
-- Options: --examples-per-cat, --lean-classified, --limit-diff-chars, --keep-merges
+- Options: --examples-per-cat, --lean-classified, --limit-diff-chars, --keep-merges, --arrow-csv
 - Keeps cross-repo aggregates in the top-level --dir folder.
 """
 
 import os, re, argparse, unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+import numpy as np
 import pandas as pd
+try:
+    import re2  # optional (pip install google-re2): DFA prefilter for the rule scans, far faster on long diffs
+except ImportError:
+    re2 = None
+try:
+    import pyarrow as pa, pyarrow.csv as pacsv  # optional: native CSV writer for --arrow-csv
+except ImportError:
+    pa = pacsv = None
 import matplotlib as mpl
+mpl.use("Agg")  # files only; also keeps worker processes off GUI backends
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 
 # ---- Safer Matplotlib defaults for PDFs
 mpl.rcParams['text.usetex'] = False
@@ -43,10 +57,29 @@ CATEGORIES = [
     "Miscellaneous / Unknown",
 ]
 
+# Labels as a categorical, so the per-category groupbys hash integer codes.
+# Categories are kept in sorted order: groupby output (and so tie order after
+# the count sorts) stays the same as grouping the plain strings.
+CATEGORY_DTYPE = pd.CategoricalDtype(sorted(CATEGORIES))
+
 # ---- File hints for touch inference
 RMD_HINTS = (".rmd", ".qmd", "_site.yml", "_output.yml", "bookdown.yml")
 RFILE_HINTS = (".r",)
 
+@lru_cache(maxsize=None)
+def compile_ci(pattern):
+    # case-insensitive pattern; cached by source, so repeated word lists
+    # (e.g. the empty Misc rules) share one object.
+    return re.compile(pattern, re.IGNORECASE)
+
+NEVER = compile_ci(r"$a")  # matches nothing; stands in for an empty word list
+
+# RE2 prefilter per rule pattern (only with re2 installed and ASCII word lists).
+# RE2's \b is ASCII-only and its (?i) doesn't fold i to Turkish İ/ı as re.I does,
+# so it never decides a match: the bare alternation (i widened to [iİı]) accepts
+# a superset in one DFA pass, and the stdlib pattern confirms the candidates.
+PREFILTERS = {}
+
 def any_re(words, word_boundaries=True):
     parts = []
     for w in words:
@@ -55,8 +88,31 @@ def any_re(words, word_boundaries=True):
             pat = r"\b" + pat + r"\b"
         parts.append(pat)
     if not parts:
-        return re.compile(r"$a", re.IGNORECASE)
-    return re.compile("|".join(parts), re.IGNORECASE)
+        return NEVER
+    pat = compile_ci("|".join(parts))
+    if re2 is not None and all(w.isascii() for w in words):
+        PREFILTERS[pat] = re2.compile("(?i)" + "|".join(re.escape(w.lower()).replace("i", "[iİı]") for w in words))
+    return pat
+
+def contains(s: pd.Series, pat) -> np.ndarray:
+    pre = PREFILTERS.get(pat)
+    if pre is None:
+        return s.str.contains(pat).to_numpy()
+    hit = np.fromiter((pre.search(x) is not None for x in s), dtype=bool, count=len(s))
+    if hit.any():
+        hit[hit] = s[hit].str.contains(pat).to_numpy()
+    return hit
+
+def scan(s: pd.Series, pat, live: np.ndarray) -> np.ndarray:
+    # contains() restricted to rows that can match: no rule matches the empty
+    # string, and a NEVER rule matches nothing, so those searches are skipped
+    hit = np.zeros(len(s), dtype=bool)
+    if pat is NEVER or not live.any():
+        return hit
+    if live.all():
+        return contains(s, pat)
+    hit[live] = contains(s[live], pat)
+    return hit
 
 # ---- Diff-aware rules (weights below)
 RULES = {
@@ -150,13 +206,6 @@ MSG_HINTS = {
     "Environment / Configuration": any_re(["config","yaml","path","environment","option","workflow","ci"]),
 }
 
-def message_hint_category(msg: str):
-    m = str(msg or "")
-    for cat, rx in MSG_HINTS.items():
-        if rx.search(m):
-            return cat
-    return None
-
 # ---- Weights & priority
 DIFF_W, PATH_W, MSG_W = 3, 3, 1
 MSG_W_IMPL = 0  # message-only for Implementation gets 0
@@ -172,76 +221,117 @@ PRIORITY = [
     "Implementation / Logic",
     "Miscellaneous / Unknown",
 ]
+PRIORITY_RANK = {c: i for i, c in enumerate(PRIORITY)}
 
 # ---- Utilities
-def sanitize_for_pdf(x: object) -> str:
-    s = str(x)
-    s = ''.join(ch for ch in s if unicodedata.category(ch)[0] != 'C')
-    s = s.replace('\\\\', r'\\\\').replace('$', r'\$')
-    return s
-
-def extract_paths(diff_text, filenames=None):
+class ControlCharTable(dict):
+    """str.translate table dropping every code point of Unicode category C*
+    (controls, format, unassigned, ...). Filled lazily, one entry per code point seen."""
+    def __missing__(self, cp):
+        self[cp] = None if unicodedata.category(chr(cp))[0] == 'C' else cp
+        return self[cp]
+
+CONTROL_CHARS = ControlCharTable()
+
+def sanitize_frame_for_pdf(df: pd.DataFrame) -> pd.DataFrame:
+    # every cell as text without control characters, backslashes doubled and '$'
+    # escaped (no mathtext); column by column, so translate/replace run in C per cell
+    return df.astype(str).apply(lambda s: s.str.translate(CONTROL_CHARS)
+                                           .str.replace('\\\\', r'\\\\', regex=False)
+                                           .str.replace('$', r'\$', regex=False))
+
+def header_paths(diff_text):
     paths = []
     for line in str(diff_text).splitlines():
         if line.startswith(('+++ ', '--- ')):
             p = re.sub(r'^[ab]/', '', line[4:].strip())
             paths.append(p)
-    if not paths and filenames:
-        paths.extend(str(filenames).split(';'))
-    return " ".join(paths)
-
-def classify_row(message: str, diff: str, filenames=None):
-    context = extract_paths(diff or "", filenames)
-    msg = str(message); d = str(diff); ctx = context
-    scores = {k: 0 for k in CATEGORIES}
-    has_strong = {k: False for k in CATEGORIES}
-    for cat, pats in RULES.items():
-        if pats["diff"].search(d):
-            scores[cat] += DIFF_W; has_strong[cat] = True
-        if ctx and pats["path"].search(ctx):
-            scores[cat] += PATH_W; has_strong[cat] = True
-        msg_w = MSG_W_IMPL if cat == "Implementation / Logic" else MSG_W
-        if pats["msg"].search(msg):
-            scores[cat] += msg_w
-    msg_cat = message_hint_category(msg)
-    strong = [c for c in CATEGORIES if has_strong[c]]
-    if strong:
-        best = max(strong, key=lambda c: (scores[c], -PRIORITY.index(c)))
-        if msg_cat in ["Documentation / Formatting","Rendering / Conversion"]:
-            if scores[msg_cat] >= scores[best] - 1:  # within 1 point, pick message cat
-                return msg_cat, scores[msg_cat]
-        return best, scores[best]
-    
-    if msg_cat:
-        return msg_cat, scores[msg_cat]
-    
-    best = max(CATEGORIES, key=lambda c: (scores[c], -PRIORITY.index(c)))
-    return best, scores[best]
+    return paths
+
+def extract_paths_frame(diffs: pd.Series, filenames: pd.Series | None = None) -> pd.Series:
+    """Space-joined header paths of each diff, else its ';'-joined filenames (if given)."""
+    # Only a diff containing "+++ "/"--- " can have header lines; GitHub API
+    # patches have none, so the line scan runs on a handful of rows.
+    hdr = (diffs.str.contains("+++ ", regex=False) | diffs.str.contains("--- ", regex=False)).to_numpy()
+    out = pd.Series("", index=diffs.index, dtype=object)
+    has_paths = np.zeros(len(diffs), dtype=bool)
+    if hdr.any():
+        found = [header_paths(d) for d in diffs[hdr]]
+        out[hdr] = [" ".join(p) for p in found]
+        has_paths[hdr] = [bool(p) for p in found]
+    if filenames is None:
+        return out
+    # no header lines -> filenames (if the cell is non-empty), split on ';'
+    fallback = ~has_paths & np.array([bool(f) for f in filenames], dtype=bool)
+    out[fallback] = filenames[fallback].astype(str).str.replace(";", " ", regex=False)
+    return out
+
+def classify_frame(messages: pd.Series, diffs: pd.Series, contexts: pd.Series):
+    """Score every commit against RULES, one regex pass per (category, field);
+    the best strong (diff/path) category wins, else the message hint, else the
+    top score, ties broken by PRIORITY. Returns (categories, scores) arrays."""
+    n, k = len(messages), len(CATEGORIES)
+    m_diff = np.zeros((n, k), dtype=bool)
+    m_path = np.zeros((n, k), dtype=bool)
+    m_msg  = np.zeros((n, k), dtype=bool)
+    live_diff, live_path, live_msg = ((s.str.len() > 0).to_numpy() for s in (diffs, contexts, messages))
+    for j, cat in enumerate(CATEGORIES):
+        pats = RULES[cat]
+        m_diff[:, j] = scan(diffs, pats["diff"], live_diff)
+        m_path[:, j] = scan(contexts, pats["path"], live_path)
+        m_msg[:, j]  = scan(messages, pats["msg"], live_msg)
+    msg_w = np.array([MSG_W_IMPL if c == "Implementation / Logic" else MSG_W for c in CATEGORIES])
+    scores = DIFF_W*m_diff + PATH_W*m_path + msg_w*m_msg
+    strong = m_diff | m_path
+
+    # max by (score, -priority) as one integer key per cell
+    rank = np.array([PRIORITY_RANK[c] for c in CATEGORIES])
+    key = scores*k + (k - 1 - rank)
+    best_strong = np.where(strong, key, -1).argmax(axis=1)
+    best_any = key.argmax(axis=1)
+
+    # message hint: first MSG_HINTS entry that matches, else -1
+    hint = np.select([contains(messages, rx) for rx in MSG_HINTS.values()],
+                     [CATEGORIES.index(c) for c in MSG_HINTS], default=-1)
+
+    rows = np.arange(n)
+    any_strong = strong.any(axis=1)
+    choice = np.where(any_strong, best_strong, np.where(hint >= 0, hint, best_any))
+    # Documentation/Rendering message hint within 1 point of the strong winner takes it
+    doc_rend = np.isin(hint, [CATEGORIES.index("Documentation / Formatting"),
+                              CATEGORIES.index("Rendering / Conversion")])
+    override = any_strong & doc_rend & (scores[rows, np.maximum(hint, 0)] >= scores[rows, best_strong] - 1)
+    choice = np.where(override, hint, choice)
+    return np.array(CATEGORIES, dtype=object)[choice], scores[rows, choice]
 
 def short_snip(s, n=180):
     s = str(s).replace("\\n", " ")
     return s[:n] + ("..." if len(s) > n else "")
 
+_BAR_FIG = None
+
+def category_bar_figure(freq_df: pd.DataFrame, figsize, title="Bug Categories — Commit Counts"):
+    # One figure per process, cleared and redrawn for every chart (PNG, PDF page, totals)
+    global _BAR_FIG
+    if _BAR_FIG is None:
+        _BAR_FIG = Figure()
+    fig = _BAR_FIG
+    fig.clear()
+    fig.set_size_inches(figsize)
+    ax = fig.add_subplot()
+    ax.bar(freq_df["bug_category"], freq_df["count"])
+    ax.set_title(title)
+    plt.setp(ax.get_xticklabels(), rotation=60, ha="right")
+    ax.set_ylabel("Commits")
+    fig.tight_layout()
+    return fig
+
 def save_category_bar(freq_df: pd.DataFrame, out_png: str):
-    plt.figure(figsize=(8,4))
-    plt.bar(freq_df["bug_category"], freq_df["count"])
-    plt.title("Bug Categories — Commit Counts")
-    plt.xticks(rotation=60, ha="right")
-    plt.ylabel("Commits")
-    plt.tight_layout()
-    plt.savefig(out_png, dpi=200)
-    plt.close()
+    category_bar_figure(freq_df, (8,4)).savefig(out_png, dpi=200)
 
 def save_examples_pdf(ex_df: pd.DataFrame, freq_df: pd.DataFrame, out_pdf: str, title="Examples per category"):
     with PdfPages(out_pdf) as pdf:
-        fig1 = plt.figure(figsize=(8.5, 5))
-        plt.bar(freq_df["bug_category"], freq_df["count"])
-        plt.title("Bug Categories — Commit Counts")
-        plt.xticks(rotation=60, ha="right")
-        plt.ylabel("Commits")
-        plt.tight_layout()
-        pdf.savefig(fig1)
-        plt.close(fig1)
+        pdf.savefig(category_bar_figure(freq_df, (8.5, 5)))
 
         cols = ["repo","bug_category","commit_hash","date","author","message","score","diff_snippet"]
         chunk = 12
@@ -253,7 +343,7 @@ def save_examples_pdf(ex_df: pd.DataFrame, freq_df: pd.DataFrame, out_pdf: str,
 
         for i in range(0, len(ex_df), chunk):
             sub = ex_df.iloc[i:i+chunk].copy()
-            sub = sub[cols].applymap(sanitize_for_pdf)
+            sub = sanitize_frame_for_pdf(sub[cols])
             fig = plt.figure(figsize=(8.5, 11)); plt.axis('off')
             plt.title(title, loc="left")
             tbl = plt.table(cellText=sub.values, colLabels=sub.columns.tolist(),
@@ -261,25 +351,34 @@ def save_examples_pdf(ex_df: pd.DataFrame, freq_df: pd.DataFrame, out_pdf: str,
             tbl.auto_set_font_size(False); tbl.set_fontsize(7.5); tbl.scale(1, 1.2)
             pdf.savefig(fig, bbox_inches='tight'); plt.close(fig)
 
+# Accepted (lowercase) column names per role, most preferred first
+COLUMN_ALIASES = {
+    "commit":    ["commit_hash","sha","hash","commit"],
+    "message":   ["message","commit_message","msg"],
+    "diff":      ["diff","patch","changes","change"],
+    "filenames": ["filenames","files","paths"],
+    "touch_r":   ["touches_r","touch_r"],
+    "touch_rmd": ["touches_rmd","touch_rmd","touches_r_markdown"],
+    "date":      ["date","author_date","commit_date"],
+    "author":    ["author","author_name","committer"],
+}
+
 def detect_columns(df: pd.DataFrame):
+    # lowercase the header once; each role takes its first alias present
     lc = {c.lower(): c for c in df.columns}
-    def pick(cands):
-        for k in cands:
-            if k in lc: return lc[k]
-        return None
-    commit_col  = pick(["commit_hash","sha","hash","commit"])
-    message_col = pick(["message","commit_message","msg"])
-    diff_col    = pick(["diff","patch","changes","change"])
-    filenames   = pick(["filenames","files","paths"])
-    touches_r   = pick(["touches_r","touch_r"])
-    touches_rmd = pick(["touches_rmd","touch_rmd","touches_r_markdown"])
-    date_col    = pick(["date","author_date","commit_date"])
-    author_col  = pick(["author","author_name","committer"])
-    return {
-        "commit": commit_col, "message": message_col, "diff": diff_col,
-        "filenames": filenames, "touch_r": touches_r, "touch_rmd": touches_rmd,
-        "date": date_col, "author": author_col
-    }
+    return {key: next((lc[a] for a in aliases if a in lc), None)
+            for key, aliases in COLUMN_ALIASES.items()}
+
+# Substrings of the ";"-terminated, lowercased filenames list that mark a touched file.
+# Terminating the list turns r"\.r(;|$)" into the literal ".r;", so no regex is needed.
+R_FILE_MARKERS   = (".r;",)
+RMD_FILE_MARKERS = (".rmd;", ".qmd;", "_site.yml", "_output.yml", "bookdown.yml")
+
+def touches_any(files: pd.Series, markers) -> pd.Series:
+    hit = files.str.contains(markers[0], regex=False)
+    for m in markers[1:]:
+        hit |= files.str.contains(m, regex=False)
+    return hit
 
 def infer_touches(df: pd.DataFrame, cols):
     # Ensure boolean columns _touch_r/_touch_rmd exist
@@ -299,10 +398,9 @@ def infer_touches(df: pd.DataFrame, cols):
     # 2) Fallback inference from filenames when missing
     files_col = cols.get("filenames")
     if files_col and files_col in df.columns:
-        files = df[files_col].astype(str).str.lower()
-        df["_touch_r"]   = df["_touch_r"]   | files.str.contains(r"\.r(;|$)", regex=True)
-        rmd_pat = r"\.rmd(;|$)|\.qmd(;|$)|_site\.yml|_output\.yml|bookdown\.yml"
-        df["_touch_rmd"] = df["_touch_rmd"] | files.str.contains(rmd_pat, regex=True)
+        files = df[files_col].astype(str).str.lower() + ";"
+        df["_touch_r"]   = df["_touch_r"]   | touches_any(files, R_FILE_MARKERS)
+        df["_touch_rmd"] = df["_touch_rmd"] | touches_any(files, RMD_FILE_MARKERS)
 
     return df
 
@@ -327,18 +425,20 @@ def build_examples(df, repo_tag, examples_per_cat, limit_diff_chars):
     return pd.DataFrame(rows)
 
 def save_qc_tables(df, repo_dir, repo_tag):
-    # Percentages with median score
-    pct = (df.groupby("bug_category", as_index=False)
-             .agg(count=("bug_category","size"),
-                  percent=("bug_category", lambda s: round(100.0*len(s)/len(df), 1)),
-                  median_score=("category_score","median"))
-             .sort_values("count", ascending=False))
+    df = df.assign(bug_category=df["bug_category"].astype(CATEGORY_DTYPE))
+    # one grouping of bug_category serves every table below
+    grp = df.groupby("bug_category", observed=True)
+
+    # Percentages with median score; both aggregations are cythonized, percent is derived from count
+    pct = grp.agg(count=("bug_category","size"), median_score=("category_score","median")).reset_index()
+    pct.insert(2, "percent", (pct["count"]*100.0/len(df)).round(1))
+    pct = pct.sort_values("count", ascending=False)
     pct.to_csv(os.path.join(repo_dir, f"{repo_tag}_category_percentages.csv"), index=False, encoding="utf-8")
 
     # Touch rates by category (Rmd, R)
-    t_rmd = (df.groupby("bug_category")["_touch_rmd"].mean().mul(100).round(1)
+    t_rmd = (grp["_touch_rmd"].mean().mul(100).round(1)
                .rename("touches_rmd_%").reset_index().sort_values("touches_rmd_%", ascending=False))
-    t_r   = (df.groupby("bug_category")["_touch_r"].mean().mul(100).round(1)
+    t_r   = (grp["_touch_r"].mean().mul(100).round(1)
                .rename("touches_r_%").reset_index().sort_values("touches_r_%", ascending=False))
 
     # Save both common filenames for Rmd (compat with older tools)
@@ -355,9 +455,8 @@ def save_qc_tables(df, repo_dir, repo_tag):
     top_paths_csv = os.path.join(repo_dir, f"{repo_tag}_top_paths.csv")
     paths_series = pd.Series(dtype=str)
     if "filenames" in df.columns:
-        s = df["filenames"].dropna().astype(str).str.split(";")
-        if not s.empty:
-            paths_series = pd.Series([p.strip() for lst in s for p in lst if p and isinstance(lst, list)])
+        parts = df["filenames"].dropna().astype(str).str.split(";").explode()
+        paths_series = parts[parts.ne("")].str.strip()
     if not paths_series.empty:
         top = (paths_series.value_counts()
                  .rename_axis("path")
@@ -367,22 +466,38 @@ def save_qc_tables(df, repo_dir, repo_tag):
     else:
         pd.DataFrame(columns=["path","count"]).to_csv(top_paths_csv, index=False, encoding="utf-8")
 
-def process_one_csv(path, skip_merges=True, examples_per_cat=3, lean_classified=False, limit_diff_chars=None):
-    fname = os.path.basename(path)
-    try:
-        df = pd.read_csv(path, encoding="utf-8")
-    except Exception:
+# Columns the per-repo summaries read after classification. short_snip(diff, 220)
+# in the examples never looks past 2*220+1 chars (each literal "\\n" shrinks to
+# one), so chunked runs keep only that much of each diff.
+SUMMARY_COLS = ["commit_hash","message","date","author","filenames",
+                "_touch_r","_touch_rmd","bug_category","category_score"]
+EXAMPLE_DIFF_CHARS = 2*220 + 1
+
+def read_frames(path, chunksize=None):
+    # Yields the whole frame, or chunk by chunk; utf-8 first, then latin-1. A header-only
+    # file yields one empty frame; nothing is yielded if the file can't be read at all.
+    # If a later chunk isn't utf-8, yields None and starts over in latin-1.
+    for enc in ("utf-8", "latin-1"):
         try:
-            df = pd.read_csv(path, encoding="latin-1")
+            if not chunksize:
+                yield pd.read_csv(path, encoding=enc)
+                return
+            reader = pd.read_csv(path, encoding=enc, chunksize=chunksize)
+            first = next(reader, None)
+            if first is None:
+                first = pd.read_csv(path, encoding=enc, nrows=0)
         except Exception:
-            print(f"[skip] Could not read {fname}")
-            return None
-
-    cols = detect_columns(df)
-    if not (cols["commit"] and cols["message"] and cols["diff"]):
-        print(f"[skip] {fname}: missing required columns (need commit hash/message/diff)")
-        return None
+            continue
+        yield first
+        try:
+            for chunk in reader:
+                yield chunk
+        except UnicodeDecodeError:
+            yield None
+            continue
+        return
 
+def prepare_frame(df, cols, skip_merges):
     # Normalize columns of interest
     rename_map = {cols["commit"]: "commit_hash", cols["message"]: "message", cols["diff"]: "diff"}
     for k in ["filenames","date","author"]:
@@ -394,32 +509,70 @@ def process_one_csv(path, skip_merges=True, examples_per_cat=3, lean_classified=
         df[c] = df[c].fillna("").astype(str)
 
     if skip_merges:
-        df = df[~df["message"].str.startswith("Merge ")].copy()
+        # Arrow's starts_with kernel beats the object-string loop even counting the conversion;
+        # the conversion is a throwaway, message stays object for the regex rules
+        msgs = df["message"].astype("string[pyarrow]") if pa is not None else df["message"]
+        df = df[~msgs.str.startswith("Merge ").to_numpy(dtype=bool)].copy()
 
     # Touch inference (creates _touch_r / _touch_rmd)
     df = infer_touches(df, cols)
 
-    # Classify
-    cats, scores = [], []
-    for msg, diff, files in zip(df["message"], df["diff"], df.get("filenames", pd.Series([""]*len(df)))):
-        cat, sc = classify_row(msg, diff, files)
-        cats.append(cat); scores.append(sc)
-    df["bug_category"] = cats
-    df["category_score"] = scores
-
-    # Repo folder
-    repo_tag = os.path.splitext(fname)[0]
-    repo_dir = os.path.join(os.path.dirname(path), repo_tag)
-    os.makedirs(repo_dir, exist_ok=True)
+    # Classify (column-wise; see classify_frame)
+    contexts = extract_paths_frame(df["diff"], df.get("filenames"))
+    df["bug_category"], df["category_score"] = classify_frame(df["message"], df["diff"], contexts)
+    return df
 
-    # Save classified
-    classified_csv = os.path.join(repo_dir, f"{repo_tag}_classified.csv")
-    out_df = df.copy()
+def write_classified(df, classified_csv, lean_classified, limit_diff_chars, append=False, arrow_csv=False):
+    # no defensive copy: drop/assign already return new frames, and the diff column is never duplicated
+    out_df = df
     if lean_classified and "diff" in out_df.columns:
         out_df = out_df.drop(columns=["diff"])
     elif limit_diff_chars is not None:
-        out_df["diff"] = out_df["diff"].astype(str).str.slice(0, int(limit_diff_chars))
-    out_df.to_csv(classified_csv, index=False, encoding="utf-8")
+        out_df = out_df.assign(diff=out_df["diff"].astype(str).str.slice(0, int(limit_diff_chars)))
+    if arrow_csv and pacsv is not None:
+        # Arrow quotes every string and writes booleans as true/false; the readers downstream accept both
+        try:
+            table = pa.Table.from_pandas(out_df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = None  # mixed-type object column; fall through to pandas
+        if table is not None:
+            with open(classified_csv, "ab" if append else "wb") as f:
+                pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=not append))
+            return
+    out_df.to_csv(classified_csv, index=False, encoding="utf-8",
+                  mode="a" if append else "w", header=not append)
+
+def process_one_csv(path, skip_merges=True, examples_per_cat=3, lean_classified=False, limit_diff_chars=None,
+                    chunksize=None, arrow_csv=False):
+    fname = os.path.basename(path)
+    repo_tag = os.path.splitext(fname)[0]
+    repo_dir = os.path.join(os.path.dirname(path), repo_tag)
+    classified_csv = os.path.join(repo_dir, f"{repo_tag}_classified.csv")
+
+    # Classify frame by frame, appending to the classified CSV; with --chunksize
+    # only the summary columns (and a diff prefix) stay in memory.
+    parts = []
+    for chunk in read_frames(path, chunksize):
+        if chunk is None:  # re-reading as latin-1; the classified CSV is rewritten
+            parts = []
+            continue
+        if not parts:
+            cols = detect_columns(chunk)
+            if not (cols["commit"] and cols["message"] and cols["diff"]):
+                print(f"[skip] {fname}: missing required columns (need commit hash/message/diff)")
+                return None
+            os.makedirs(repo_dir, exist_ok=True)
+        chunk = prepare_frame(chunk, cols, skip_merges)
+        write_classified(chunk, classified_csv, lean_classified, limit_diff_chars, append=bool(parts),
+                         arrow_csv=arrow_csv)
+        if chunksize:
+            chunk = (chunk[[c for c in SUMMARY_COLS if c in chunk.columns]]
+                     .assign(diff=chunk["diff"].str.slice(0, EXAMPLE_DIFF_CHARS)))
+        parts.append(chunk)
+    if not parts:
+        print(f"[skip] Could not read {fname}")
+        return None
+    df = parts[0] if len(parts) == 1 else pd.concat(parts)
 
     # Frequencies / bar chart
     freq = df["bug_category"].value_counts().rename_axis("bug_category").reset_index(name="count")
@@ -446,39 +599,32 @@ def process_one_csv(path, skip_merges=True, examples_per_cat=3, lean_classified=
         "freq": freq.assign(repo=repo_tag)
     }
 
-def main(in_dir: str, keep_merges: bool, examples_per_cat: int, lean_classified: bool, limit_diff_chars: int | None):
-    aggregate_counts = []
-    for fname in os.listdir(in_dir):
-        if not fname.lower().endswith(".csv"):
-            continue
-        info = process_one_csv(
-            os.path.join(in_dir, fname),
-            skip_merges=(not keep_merges),
-            examples_per_cat=examples_per_cat,
-            lean_classified=lean_classified,
-            limit_diff_chars=limit_diff_chars
-        )
-        if info:
-            aggregate_counts.append(info["freq"])
+def main(in_dir: str, keep_merges: bool, examples_per_cat: int, lean_classified: bool, limit_diff_chars: int | None,
+         jobs: int = 1, chunksize: int | None = None, arrow_csv: bool = False):
+    paths = [os.path.join(in_dir, f) for f in os.listdir(in_dir) if f.lower().endswith(".csv")]
+    args = (paths, repeat(not keep_merges), repeat(examples_per_cat),
+            repeat(lean_classified), repeat(limit_diff_chars), repeat(chunksize), repeat(arrow_csv))
+    if jobs <= 1:
+        infos = map(process_one_csv, *args)
+    else:
+        # repos are independent; each worker classifies and plots one CSV
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            infos = list(pool.map(process_one_csv, *args))
+    aggregate_counts = [info["freq"] for info in infos if info]
 
     # Cross-repo aggregates at top level
     if aggregate_counts:
         agg = pd.concat(aggregate_counts, ignore_index=True)
-        pivot = (agg.pivot_table(index="repo", columns="bug_category", values="count",
-                                 aggfunc="sum", fill_value=0)
+        # (repo, category) pairs are unique, so a plain unstack replaces pivot_table's sum
+        pivot = (agg.set_index(["repo","bug_category"])["count"]
+                    .unstack("bug_category", fill_value=0).astype("int64")
                     .reindex(columns=CATEGORIES, fill_value=0))
         agg_csv = os.path.join(in_dir, "cross_repo_category_counts.csv")
         pivot.to_csv(agg_csv, encoding="utf-8")
 
         totals = agg.groupby("bug_category")["count"].sum().reset_index()
-        plt.figure(figsize=(8,4))
-        plt.bar(totals["bug_category"], totals["count"])
-        plt.title("All Repos — Bug Categories (Total Commits)")
-        plt.xticks(rotation=60, ha="right")
-        plt.ylabel("Commits")
-        plt.tight_layout()
         totals_png = os.path.join(in_dir, "cross_repo_category_totals.png")
-        plt.savefig(totals_png, dpi=200); plt.close()
+        category_bar_figure(totals, (8,4), title="All Repos — Bug Categories (Total Commits)").savefig(totals_png, dpi=200)
         print(f"[ok] cross repo -> {agg_csv} | {totals_png}")
 
     print("Done.")
@@ -490,5 +636,12 @@ if __name__ == "__main__":
     ap.add_argument("--examples-per-cat", type=int, default=3, help="Examples per category in appendix")
     ap.add_argument("--lean-classified", action="store_true", help="Drop the 'diff' column in the classified CSV")
     ap.add_argument("--limit-diff-chars", type=int, default=None, help="Truncate diff text to N chars in outputs")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Worker processes; N > 1 classifies N repo CSVs at once (default: 1 = serial)")
+    ap.add_argument("--chunksize", type=int, default=None,
+                    help="Read each CSV N rows at a time to bound memory on very large repos (default: whole file)")
+    ap.add_argument("--arrow-csv", action="store_true",
+                    help="Write the classified CSV with pyarrow (faster; quotes all strings, lowercase booleans)")
     args = ap.parse_args()
-    main(args.dir, args.keep_merges, args.examples_per_cat, args.lean_classified, args.limit_diff_chars)
+    main(args.dir, args.keep_merges, args.examples_per_cat, args.lean_classified, args.limit_diff_chars,
+         args.jobs, args.chunksize, args.arrow_csv)
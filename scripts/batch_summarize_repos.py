@@ -16,30 +16,68 @@
 # so missing summary files will not crash the script.
 
 import os
+import re
 import sys
 import argparse
+import numpy as np
 import pandas as pd
-from collections import Counter
+from pandas.api.types import is_bool_dtype
 
 # --- helpers (from summarize_repo.py) ---
 
-def detect(df, *cands):
+# Accepted spellings of each input column (matched case-insensitively by detect)
+COLUMN_ALIASES = {
+    "cat":     ("bug_category", "category", "label"),
+    "score":   ("category_score", "score"),
+    "touch":   ("touches_rmd", "touch_rmd", "rmd"),
+    "files":   ("filenames", "files", "paths"),
+    "touch_r": ("touches_r", "touch_r"),
+}
+SUMMARY_COLUMNS = {a for names in COLUMN_ALIASES.values() for a in names}
+
+def read_classified(path):
+    """Parse only the columns the summary can use; message/diff are the bulk of the file."""
+    return pd.read_csv(path, usecols=lambda c: c.lower() in SUMMARY_COLUMNS)
+
+def detect(lower, *cands):
+    # candidates are the lowercase COLUMN_ALIASES spellings
+    return next((lower[c] for c in cands if c in lower), None)
+
+def detect_columns(df):
+    """Actual column name (or None) for each COLUMN_ALIASES key; the name map is built once."""
     lower = {c.lower(): c for c in df.columns}
-    for c in cands:
-        if c.lower() in lower:
-            return lower[c.lower()]
-    return None
-
-def infer_rmd_touch(row, col_files):
-    """If touches_rmd is missing, infer it from filenames."""
-    if col_files is None:
-        return False
-    val = str(row[col_files] or "")
-    toks = [t.strip().lower() for t in val.split(";") if t.strip()]
-    if not toks:
-        return False
-    RMD_HINTS = (".rmd", ".qmd", "_site.yml", "_output.yml", "bookdown.yml")
-    return any(any(tok.endswith(h) or h in tok for h in RMD_HINTS) for tok in toks)
+    return {key: detect(lower, *names) for key, names in COLUMN_ALIASES.items()}
+
+RMD_HINTS = (".rmd", ".qmd", "_site.yml", "_output.yml", "bookdown.yml")
+RMD_RE = re.compile("|".join(map(re.escape, RMD_HINTS)))  # any hint, anywhere in a lowered cell
+R_FILE_RE = re.compile(r"\.r(?:;|$)")  # a path ending in .R/.r, matched on lowered filenames
+
+def infer_rmd_touch(files_lc):
+    """If touches_rmd is missing, infer it from the lowered ';'-joined filenames column."""
+    # a hint anywhere in any path counts, and no hint contains ';' or spaces,
+    # so one substring scan over the whole cell is enough
+    return files_lc.str.contains(RMD_RE)
+
+TRUE_STRINGS = {"true", "t", "1", "yes", "y"}
+
+def to_bool(s):
+    """Coerce a touches_* column to bool (text columns: case/space-insensitive TRUE_STRINGS)."""
+    if is_bool_dtype(s):
+        return s  # already flags (the usual case for our own CSVs); no copy
+    if s.dtype != object:
+        return s.astype(bool, copy=False)
+    # normalise each distinct value once; factorize codes missing values as -1,
+    # which picks the trailing False
+    codes, uniques = pd.factorize(s)
+    truth = np.array([str(u).strip().lower() in TRUE_STRINGS for u in uniques] + [False])
+    return pd.Series(truth[codes], index=s.index)
+
+def touch_rates(df, col_cat):
+    """Rmd and R touch rates (%) per category, from one group-by over both flag columns."""
+    rates = df.groupby(col_cat, observed=True)[["_touch_rmd", "_touch_r"]].mean().mul(100).round(1)
+    def table(flag, name):
+        return rates[flag].rename(name).reset_index().sort_values(name, ascending=False)
+    return table("_touch_rmd", "touches_rmd_%"), table("_touch_r", "touches_r_%")
 
 def pct_table(d, col_cat):
     c = d[col_cat].value_counts(dropna=False).rename_axis('bug_category').reset_index(name='count')
@@ -49,14 +87,15 @@ def pct_table(d, col_cat):
 # --- per-repo summarization ---
 
 def summarize_one_repo(in_csv: str):
-    df = pd.read_csv(in_csv)
+    df = read_classified(in_csv)
 
     # Column detection
-    col_cat   = detect(df, "bug_category","category","label")
-    col_score = detect(df, "category_score","score")
-    col_touch = detect(df, "touches_rmd","touch_rmd","rmd")
-    col_files = detect(df, "filenames","files","paths")
-    col_touch_r = detect(df, "touches_r", "touch_r")
+    cols = detect_columns(df)
+    col_cat   = cols["cat"]
+    col_score = cols["score"]
+    col_touch = cols["touch"]
+    col_files = cols["files"]
+    col_touch_r = cols["touch_r"]
 
     if col_cat is None:
         raise RuntimeError("Could not find bug_category column (aliases: bug_category/category/label).")
@@ -68,57 +107,41 @@ def summarize_one_repo(in_csv: str):
     # 1) Category percentages
     pct = pct_table(df, col_cat)
 
-    # 2) Rmd touch rates by category
+    # later group-bys key on the small label set; categorical codes skip string hashing
+    # (after pct_table, whose tie order follows first appearance of each label)
+    df[col_cat] = df[col_cat].astype("category")
+
+    # 2) Rmd and R touch flags
+    # filenames are lowered once for whichever flag has to be inferred from paths
+    files_lc = df[col_files].str.lower() if col_files and not (col_touch and col_touch_r) else None
     if col_touch and col_touch in df.columns:
-        s = df[col_touch]
-        if s.dtype == object:
-            s = s.astype(str).str.strip().str.lower().isin(["true","t","1","yes","y"])
-        else:
-            s = s.astype(bool)
-        df["_touch_rmd"] = s
+        df["_touch_rmd"] = to_bool(df[col_touch])
     else:
-        df["_touch_rmd"] = df.apply(lambda r: infer_rmd_touch(r, col_files), axis=1)
-
-    touch_rmd = (
-        df.groupby(col_cat)["_touch_rmd"]
-          .mean().mul(100).round(1)
-          .rename("touches_rmd_%")
-          .reset_index()
-          .sort_values("touches_rmd_%", ascending=False)
-    )
-
-    # 3) Top paths (from filenames)
-    top_paths = pd.DataFrame(columns=["path","count"])
-    if col_files and col_files in df.columns:
-        all_files = []
-        for x in df[col_files]:
-            if not x:
-                continue
-            all_files.extend([p.strip() for p in str(x).split(";") if p.strip()])
-        if all_files:
-            cnt = Counter(all_files).most_common(15)
-            top_paths = pd.DataFrame(cnt, columns=["path","count"])
-
-    # 4) R touch rates by category
+        df["_touch_rmd"] = infer_rmd_touch(files_lc) if col_files else False
     if col_touch_r and col_touch_r in df.columns:
-        s_r = df[col_touch_r]
-        if s_r.dtype == object:
-            s_r = s_r.astype(str).str.strip().str.lower().isin(["true","t","1","yes","y"])
-        else:
-            s_r = s_r.astype(bool)
-        df["_touch_r"] = s_r
+        df["_touch_r"] = to_bool(df[col_touch_r])
     else:
         df["_touch_r"] = False
         if col_files and col_files in df.columns:
-            df["_touch_r"] = df[col_files].astype(str).str.lower().str.contains(r"\.r(;|$)", regex=True)
-
-    touch_r = (
-        df.groupby(col_cat)["_touch_r"]
-          .mean().mul(100).round(1)
-          .rename("touches_r_%")
-          .reset_index()
-          .sort_values("touches_r_%", ascending=False)
-    )
+            df["_touch_r"] = files_lc.str.contains(R_FILE_RE)
+
+    # 3) Top paths (from filenames)
+    top_paths = pd.DataFrame(columns=["path","count"])
+    if col_files and col_files in df.columns:
+        paths = df[col_files].str.split(";").explode().str.strip()
+        paths = paths[paths.ne("")]
+        if not paths.empty:
+            # stable sort on first-seen order keeps ties ordered like Counter.most_common
+            top_paths = (paths.value_counts(sort=False)
+                              .sort_values(ascending=False, kind="stable")
+                              .head(15)
+                              .rename_axis("path")
+                              .reset_index(name="count"))
+
+    # 4) Rmd and R touch rates by category
+    # only the label and the flags are needed from here on; drop the path strings first
+    df, files_lc = df[[col_cat, "_touch_rmd", "_touch_r"]], None
+    touch_rmd, touch_r = touch_rates(df, col_cat)
 
     # Save next to input
     base, _ = os.path.splitext(in_csv)
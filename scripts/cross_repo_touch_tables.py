@@ -17,11 +17,16 @@ import os
 import argparse
 import pandas as pd
 
-def detect_col(df, substr):
+def detect_cols(df, *substrs):
+    # one pass over the columns; each substring gets the first column containing it
+    subs = [s.lower() for s in substrs]
+    found = [None] * len(subs)
     for c in df.columns:
-        if substr.lower() in c.lower():
-            return c
-    return None
+        cl = c.lower()
+        for i, s in enumerate(subs):
+            if found[i] is None and s in cl:
+                found[i] = c
+    return found
 
 def main():
     ap = argparse.ArgumentParser()
@@ -34,8 +39,9 @@ def main():
     print("QC columns:", list(qc.columns))
 
     # detect columns
-    col_status = detect_col(qc, "status") or "status"
-    col_base   = detect_col(qc, "base")   or "base"
+    col_status, col_base = detect_cols(qc, "status", "base")
+    col_status = col_status or "status"
+    col_base   = col_base   or "base"
     col_repo   = "repo"
     for c in qc.columns:
         if c.lower() == "repo":
@@ -61,8 +67,7 @@ def main():
             print(f"[WARN] R-touch file not found for {repo_name}: {r_file}")
         else:
             df_r = pd.read_csv(r_file)
-            col_cat = detect_col(df_r, "category")
-            col_pct = detect_col(df_r, "touches_r")
+            col_cat, col_pct = detect_cols(df_r, "category", "touches_r")
             if col_cat is None or col_pct is None:
                 print(f"[WARN] Missing category/touches_r column in {r_file}")
             else:
@@ -75,8 +80,7 @@ def main():
             print(f"[WARN] Rmd-touch file not found for {repo_name}: {rmd_file}")
         else:
             df_rmd = pd.read_csv(rmd_file)
-            col_cat2 = detect_col(df_rmd, "category")
-            col_pct2 = detect_col(df_rmd, "touches_rmd")
+            col_cat2, col_pct2 = detect_cols(df_rmd, "category", "touches_rmd")
             if col_cat2 is None or col_pct2 is None:
                 print(f"[WARN] Missing category/touches_rmd column in {rmd_file}")
             else:
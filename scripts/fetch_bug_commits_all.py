@@ -37,11 +37,19 @@ python fetch_bug_commits_all.py ^
 
 """
 
-import argparse, csv, os, re, sys, time, datetime as dt
+import argparse, csv, functools, os, re, sys, time, datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable, Dict, Any, List, Tuple, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+from gh_paging import prefetch_pages
+try:
+    import re2  # optional (pip install google-re2): DFA prefilter for the keyword scan
+except ImportError:
+    re2 = None
 
 GITHUB = "https://api.github.com"
 
@@ -66,6 +74,11 @@ RFILE_HINTS = (".r",)
 # ---------- utils
 
 def any_re(words: Iterable[str], word_boundaries=True) -> re.Pattern:
+    # the word list is materialised so repeat calls with the same keywords reuse one pattern
+    return _compile_any(tuple(words), word_boundaries)
+
+@functools.lru_cache(maxsize=32)
+def _compile_any(words: tuple, word_boundaries: bool) -> re.Pattern:
     parts = []
     for w in words:
         w = w.strip()
@@ -80,6 +93,18 @@ def any_re(words: Iterable[str], word_boundaries=True) -> re.Pattern:
         return re.compile(r"$a", re.I)
     return re.compile("|".join(parts), re.I)
 
+def keyword_matcher(words: Iterable[str]):
+    """Predicate equivalent to any_re(words).search(msg) is not None."""
+    words = [w.strip() for w in words if w.strip()]
+    kw_re = any_re(words, word_boundaries=True)
+    if re2 is None or not words or not all(w.isascii() for w in words):
+        return lambda msg: kw_re.search(msg) is not None
+    # RE2's \b is ASCII-only and its (?i) doesn't fold i to Turkish İ/ı as re.I does,
+    # so it only prefilters: the bare alternation (i widened to [iİı]) accepts a
+    # superset in one DFA pass, and kw_re confirms the few hits exactly.
+    pre = re2.compile("(?i)" + "|".join(re.escape(w.lower()).replace("i", "[iİı]") for w in words))
+    return lambda msg: pre.search(msg) is not None and kw_re.search(msg) is not None
+
 def load_keywords(args) -> List[str]:
     if args.keywords_file:
         with open(args.keywords_file, "r", encoding="utf-8") as f:
@@ -97,14 +122,13 @@ def normalize_repo_df(path: str) -> pd.DataFrame:
 
     if has("owner") and has("repo"):
         out = df[[cols["owner"], cols["repo"]]].rename(columns={cols["owner"]:"owner", cols["repo"]:"repo"})
-    elif has("full_name"):
-        s = df[cols["full_name"]].astype(str).str.strip()
-        out = s.str.split("/", n=1, expand=True)
-        out.columns = ["owner","repo"]
-    elif has("url"):
-        s = df[cols["url"]].astype(str).str.replace("https://github.com/","", regex=False)
-        out = s.str.split("/", n=1, expand=True)
-        out.columns = ["owner","repo"]
+    elif has("full_name") or has("url"):
+        if has("full_name"):
+            s = df[cols["full_name"]].astype(str).str.strip()
+        else:
+            s = df[cols["url"]].astype(str).str.replace("https://github.com/","", regex=False)
+        # one scan: owner before the first "/", repo = the rest; no "/" -> NaN, dropped below
+        out = s.str.extract(r"^([^/]*)/(.*)$").set_axis(["owner","repo"], axis=1)
     else:
         raise SystemExit("repos CSV must have either (owner,repo) or full_name or url columns.")
 
@@ -114,6 +138,17 @@ def normalize_repo_df(path: str) -> pd.DataFrame:
     out["repo"]  = out["repo"].str.strip().str.strip("/")
     return out
 
+def make_session(pool_size: int = 32) -> requests.Session:
+    # Keep-alive connections shared by all calls (and detail-fetch threads). Gateway
+    # errors are retried by urllib3 with backoff; 403 rate limits stay in gh_get since
+    # they need the reset header.
+    retry = Retry(total=5, status_forcelist=(502, 503, 504), backoff_factor=1.5, raise_on_status=False)
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=pool_size, max_retries=retry))
+    return s
+
+SESSION = make_session()
+
 def gh_get(url: str, params: Dict[str, Any] = None, token: Optional[str]=None, max_retries=5) -> requests.Response:
     headers = {
         "Accept": "application/vnd.github+json",
@@ -122,7 +157,7 @@ def gh_get(url: str, params: Dict[str, Any] = None, token: Optional[str]=None, m
     if token:
         headers["Authorization"] = f"token {token}"
     for attempt in range(max_retries):
-        r = requests.get(url, params=params, headers=headers)
+        r = SESSION.get(url, params=params, headers=headers)
         # Handle secondary rate limiting (403) or abuse detection with retry
         if r.status_code == 403 and "rate limit" in r.text.lower():
             reset = r.headers.get("X-RateLimit-Reset")
@@ -134,28 +169,22 @@ def gh_get(url: str, params: Dict[str, Any] = None, token: Optional[str]=None, m
                     wait_s = 60
             time.sleep(min(wait_s, 90))
             continue
-        if r.status_code in (502, 503, 504):
-            time.sleep(1.5 * (attempt + 1))
-            continue
         r.raise_for_status()
         return r
     r.raise_for_status()
     return r  # unreachable
 
 def list_commits(owner: str, repo: str, token: Optional[str], since: Optional[str], until: Optional[str]) -> Iterable[Dict[str,Any]]:
-    page = 1
     params = {"per_page": 100}
     if since: params["since"] = since
     if until: params["until"] = until
-    while True:
-        params["page"] = page
-        resp = gh_get(f"{GITHUB}/repos/{owner}/{repo}/commits", params=params, token=token)
-        data = resp.json()
-        if not data:
-            break
-        for item in data:
-            yield item
-        page += 1
+
+    def get_page(page: int) -> list:
+        resp = gh_get(f"{GITHUB}/repos/{owner}/{repo}/commits", params={**params, "page": page}, token=token)
+        return resp.json()
+
+    for data in prefetch_pages(get_page, params["per_page"]):
+        yield from data
 
 def get_commit_details(owner: str, repo: str, sha: str, token: Optional[str]) -> Dict[str,Any]:
     resp = gh_get(f"{GITHUB}/repos/{owner}/{repo}/commits/{sha}", token=token)
@@ -173,24 +202,25 @@ def extract_record(owner: str, repo: str, details: Dict[str,Any]) -> Dict[str,An
     committer = c.get("committer") or {}
     files = details.get("files") or []
     filenames = [f.get("filename","") for f in files if f.get("filename")]
-    touched_rmd = False
-    touched_r = False
-    for fn in filenames:
-        l = fn.lower()
-        if any((l.endswith(h) or h in l) for h in RMD_HINTS):
-            touched_rmd = True
-        if l.endswith(".r"):  # plain R files
-            touched_r = True
-
-    # assemble diff text
-    patches = []
+    # NUL never occurs in a git path, so one lowered, NUL-terminated string answers both
+    # tests with C-level substring scans: a hint anywhere in a name, or an R extension
+    # right before its terminator
+    lowered = "\0".join(filenames).lower() + "\0"
+    touched_rmd = any(h in lowered for h in RMD_HINTS)
+    touched_r = any(h + "\0" in lowered for h in RFILE_HINTS)  # plain R files
+
+    # assemble diff text: collect the pieces flat and join once, so each patch
+    # is copied a single time instead of first into a per-file header string
+    pieces = []
     added = deleted = changed = 0
     for f in files:
         if f.get("patch"):
-            patches.append(f"---FILE: {f.get('filename')}---\n{f.get('patch')}")
+            pieces += ("\n\n---FILE: ", str(f.get("filename")), "---\n", f.get("patch"))
         added   += int(f.get("additions", 0) or 0)
         deleted += int(f.get("deletions", 0) or 0)
         changed += int(f.get("changes",   0) or 0)
+    if pieces:
+        pieces[0] = "---FILE: "  # no separator before the first file
 
     return {
         "repo_owner": owner,
@@ -211,9 +241,50 @@ def extract_record(owner: str, repo: str, details: Dict[str,Any]) -> Dict[str,An
         "added": added,
         "deleted": deleted,
         "changed": changed,
-        "diff": "\n\n".join(patches)
+        "diff": "".join(pieces)
     }
 
+def fetch_record(owner: str, repo: str, sha: str, token: Optional[str], args) -> Optional[Dict[str,Any]]:
+    # Detail fetch + filters for one matched SHA; None if it is filtered out or fails.
+    try:
+        details = get_commit_details(owner, repo, sha, token=token)
+        if args.skip_merges and is_merge_commit(details):
+            return None
+        rec = extract_record(owner, repo, details)
+        if args.require_r_or_rmd_touch and not rec["touches_r_or_rmd"]:
+            return None
+        elif args.require_rmd_touch and not rec["touches_rmd"]:
+            return None
+        return rec
+    except requests.HTTPError as e:
+        print(f"    ! HTTPError on {sha}: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"    ! Error on {sha}: {e}", file=sys.stderr)
+    return None
+
+def known_shas(partial_csv: str) -> set:
+    # SHAs already saved by an interrupted run; an unreadable file, or one without
+    # a complete row, is started over.
+    # A crash can leave the last row half-written, and the rows appended on resume
+    # would run into it, so the file is first cut back to its last complete record:
+    # the last line end with an even number of quotes before it (the writer doubles
+    # quotes inside fields, so an odd count means a quoted field is still open).
+    try:
+        with open(partial_csv, "r+b") as f:
+            pos = end = quotes = 0
+            for line in f:
+                pos += len(line)
+                quotes += line.count(b'"')
+                if line.endswith(b"\n") and quotes % 2 == 0:
+                    end = pos
+            f.truncate(end)
+        shas = set(pd.read_csv(partial_csv, usecols=["commit_hash"], dtype=str)["commit_hash"].dropna())
+    except Exception:
+        shas = set()
+    if not shas:
+        os.remove(partial_csv)
+    return shas
+
 # ---------- main
 
 def main():
@@ -229,7 +300,10 @@ def main():
                     help="Keep only commits that touch .Rmd/.qmd/_site.yml/_output.yml/bookdown.yml.")
     ap.add_argument("--require-r-or-rmd-touch", action="store_true",
                     help="Keep only commits that touch .R OR R Markdown artifacts (.Rmd/.qmd/_site.yml/_output.yml/bookdown.yml).")
-    ap.add_argument("--overwrite", action="store_true", help="Overwrite existing per-repo CSVs if present.")
+    ap.add_argument("--overwrite", action="store_true",
+                    help="Overwrite existing per-repo CSVs if present (also discards unfinished .partial progress).")
+    ap.add_argument("--workers", type=int, default=8,
+                    help="Concurrent commit-detail requests (default: 8; 1 = serial).")
     args = ap.parse_args()
 
     token = os.getenv("GITHUB_TOKEN") or os.getenv("GITHUB_PAT")
@@ -238,7 +312,7 @@ def main():
 
     os.makedirs(args.out_dir, exist_ok=True)
     kw_list = load_keywords(args)
-    kw_re = any_re(kw_list, word_boundaries=True)
+    kw_match = keyword_matcher(kw_list)
     repos = normalize_repo_df(args.repos_csv)
 
     for i, row in repos.iterrows():
@@ -252,39 +326,62 @@ def main():
 
         print(f"[{i+1}/{len(repos)}] {tag}: listing commits (all history{' since '+args.since if args.since else ''})...")
         matched: List[str] = []
-        total_listed = 0
+        total_listed = merges = 0
         for item in list_commits(owner, repo, token=token, since=args.since, until=args.until):
             total_listed += 1
             msg = ((item.get("commit") or {}).get("message") or "")[:10000]
-            if kw_re.search(msg):
+            if kw_match(msg):
+                # list items carry the parents too, so merges are dropped before
+                # paying for their (often large) detail request
+                if args.skip_merges and is_merge_commit(item):
+                    merges += 1
+                    continue
                 matched.append(item.get("sha"))
 
-        print(f"  -> listed {total_listed} commits, keyword-matched {len(matched)}.")
-
-        rows: List[Dict[str,Any]] = []
-        for idx, sha in enumerate(matched, 1):
+        print(f"  -> listed {total_listed} commits, keyword-matched {len(matched) + merges}"
+              + (f" ({merges} merges skipped)." if args.skip_merges else "."))
+
+        # Rows are written to <out>.partial as they arrive and the file is renamed once the
+        # repo is done. An interrupted run leaves the .partial behind; the next run keeps
+        # its rows and only fetches the SHAs it doesn't have yet.
+        partial = out_csv + ".partial"
+        if os.path.exists(partial) and args.overwrite:
+            os.remove(partial)
+        known = known_shas(partial) if os.path.exists(partial) else set()
+        if known:
+            matched = [sha for sha in matched if sha not in known]
+            print(f"  -> resuming: {len(known)} rows already saved, {len(matched)} commits left.")
+
+        # Detail fetches are pure network waits, so threads overlap them; map() keeps
+        # the listing order. gh_get backs off per request on rate-limit responses.
+        fetch = lambda sha: fetch_record(owner, repo, sha, token, args)
+        pool = ThreadPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+        writer, n_rows = None, len(known)
+        # one buffered writer per repo; same CSV dialect as pandas' to_csv
+        with open(partial, "a", newline="", encoding="utf-8", buffering=1 << 20) as f:
             try:
-                details = get_commit_details(owner, repo, sha, token=token)
-                if args.skip_merges and is_merge_commit(details):
-                    continue
-                rec = extract_record(owner, repo, details)
-                if args.require_r_or_rmd_touch and not rec["touches_r_or_rmd"]:
-                    continue
-                elif args.require_rmd_touch and not rec["touches_rmd"]:
-                    continue
-                rows.append(rec)
-            except requests.HTTPError as e:
-                print(f"    ! HTTPError on {sha}: {e}", file=sys.stderr)
-                continue
-            except Exception as e:
-                print(f"    ! Error on {sha}: {e}", file=sys.stderr)
-                continue
-
-            # be polite to the API
-            if idx % 50 == 0:
-                time.sleep(0.3)
-
-        if not rows:
+                for rec in (pool.map(fetch, matched) if pool else map(fetch, matched)):
+                    if rec is None:
+                        continue
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(rec), lineterminator=os.linesep)
+                        if not known:
+                            writer.writeheader()
+                    writer.writerow(rec)
+                    n_rows += 1
+            finally:
+                if pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            # one fsync per repo, so the rename below never publishes a file
+            # whose rows are still only in the page cache
+            f.flush()
+            os.fsync(f.fileno())
+
+        if n_rows:
+            os.replace(partial, out_csv)
+            print(f"  -> saved {n_rows} rows to {out_csv}")
+        else:
+            os.remove(partial)
             # still write an empty file for traceability
             pd.DataFrame(columns=[
                 "repo_owner","repo_name","commit_hash","author_name","author_email",
@@ -292,11 +389,6 @@ def main():
                 "message","filenames","touches_rmd","is_merge","added","deleted","changed","diff"
             ]).to_csv(out_csv, index=False)
             print(f"  -> saved 0 rows to {out_csv}")
-            continue
-
-        df = pd.DataFrame(rows)
-        df.to_csv(out_csv, index=False)
-        print(f"  -> saved {len(df)} rows to {out_csv}")
 
 if __name__ == "__main__":
     main()
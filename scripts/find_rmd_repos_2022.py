@@ -33,31 +33,55 @@ python find_rmd_repos_2022.py \
 #   --max-repos 1200                 limit processing for speed
 #   --skip-merges                    exclude merges from keyword matching (default: on)
 #   --only-from-file repos.csv       read repos from CSV (column 'full_name') instead of searching
+#   --cache-dir .cache               reuse repo metadata lookups from earlier runs (--cache-ttl-hours, default 24)
+#   --graphql-metadata               fetch repo metadata in GraphQL batches of 50 instead of 3 REST calls per repo
+#   --workers 4                      screen this many repos concurrently (1 = serial)
 
 Notes
 -----
 - API rate limits apply: use a token to get 5000 requests/hour.
 - The search step (code search) returns up to 1000 repos per query; we deduplicate across multiple queries.
 - Commit enumeration uses the REST API with since/until and paginates at 100 per page.
-- This is a single-threaded, conservative script designed for reliability.
+- Repos are screened by a small thread pool (--workers); each worker keeps the polite per-repo pauses.
 """
 
 import os
 import sys
 import time
 import csv
+import json
+import re
 import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from urllib.parse import quote_plus
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from gh_paging import prefetch_pages
 
 GITHUB = "https://api.github.com"
 TOKEN = os.getenv("GITHUB_TOKEN", "").strip()
+CACHE_DIR = None          # --cache-dir; None disables the on-disk metadata cache
+CACHE_TTL = 24 * 3600     # seconds; --cache-ttl-hours
+GRAPHQL_BATCH = 50        # repositories per GraphQL request (--graphql-metadata)
 
 def log(msg, *a, **k):
     print(msg, *a, file=sys.stderr, **k)
 
+def make_session():
+    # Keep-alive connections across the thousands of calls; gateway errors are
+    # retried with backoff, rate limits are handled in gh_get
+    retry = Retry(total=5, status_forcelist=(502, 503, 504), backoff_factor=1.5, raise_on_status=False)
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+    return s
+
+SESSION = make_session()
+
 def gh_get(url, params=None, accept=None):
     headers = {
         "Accept": accept or "application/vnd.github+json",
@@ -65,7 +89,7 @@ def gh_get(url, params=None, accept=None):
     }
     if TOKEN:
         headers["Authorization"] = f"Bearer {TOKEN}"
-    r = requests.get(url, headers=headers, params=params, timeout=30)
+    r = SESSION.get(url, headers=headers, params=params, timeout=30)
     if r.status_code == 403 and "rate limit" in r.text.lower():
         reset = r.headers.get("X-RateLimit-Reset")
         if reset:
@@ -76,6 +100,48 @@ def gh_get(url, params=None, accept=None):
     r.raise_for_status()
     return r
 
+def gh_graphql(query):
+    headers = {"User-Agent": "rmarkdown-defect-finder-2022", "Authorization": f"Bearer {TOKEN}"}
+    r = SESSION.post(f"{GITHUB}/graphql", json={"query": query}, headers=headers, timeout=60)
+    r.raise_for_status()
+    return r.json()
+
+# The fields get_repo / get_langs / has_description read, for one aliased repository
+REPO_FIELDS = """
+  stargazerCount isFork isArchived pushedAt url
+  repositoryTopics(first: 100) { nodes { topic { name } } }
+  languages(first: 100) { edges { size node { name } } }
+  description: object(expression: "HEAD:DESCRIPTION") { __typename }
+"""
+
+def get_repos_graphql(full_names):
+    """(meta, langs, has_description) per repo, GRAPHQL_BATCH repos per request, shaped
+    like the REST answers. Repos GraphQL can't resolve (renamed, missing) or batches
+    that fail are left out; the caller falls back to REST for them."""
+    out = {}
+    for k in range(0, len(full_names), GRAPHQL_BATCH):
+        chunk = full_names[k:k+GRAPHQL_BATCH]
+        aliases = []
+        for i, full_name in enumerate(chunk):
+            owner, name = full_name.split("/", 1)
+            aliases.append(f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{{REPO_FIELDS}}}")
+        try:
+            data = gh_graphql("query {" + "\n".join(aliases) + "}").get("data") or {}
+        except Exception as e:
+            log(f"[warn] GraphQL batch failed, using REST for {len(chunk)} repos: {e}")
+            continue
+        for i, full_name in enumerate(chunk):
+            node = data.get(f"r{i}")
+            if not node:
+                continue
+            meta = {"fork": node["isFork"], "archived": node["isArchived"],
+                    "stargazers_count": node["stargazerCount"], "pushed_at": node["pushedAt"],
+                    "html_url": node["url"],
+                    "topics": [t["topic"]["name"] for t in node["repositoryTopics"]["nodes"]]}
+            langs = {e["node"]["name"]: e["size"] for e in node["languages"]["edges"]}
+            out[full_name] = (meta, langs, node["description"] is not None)
+    return out
+
 def search_code(q, per_page=100, max_pages=10):
     """Yield code-search items for query q."""
     for page in range(1, max_pages+1):
@@ -89,47 +155,174 @@ def search_code(q, per_page=100, max_pages=10):
             break
         time.sleep(0.15)
 
+_RAISE = object()  # disk_cached default: let the getter's exceptions propagate
+
+def disk_cached(kind, on_error=_RAISE, errors=requests.HTTPError):
+    """Keep a per-repo getter's JSON result in CACHE_DIR/<owner>__<repo>.<kind>.json
+    for CACHE_TTL seconds, so re-runs skip the metadata calls. If the getter raises one
+    of `errors` and `on_error` is given, that value is returned instead and never cached."""
+    def deco(fn):
+        def lookup(full_name):
+            try:
+                return True, fn(full_name)
+            except errors:
+                if on_error is _RAISE:
+                    raise
+                return False, on_error
+
+        @functools.wraps(fn)
+        def wrapper(full_name):
+            if not CACHE_DIR:
+                return lookup(full_name)[1]
+            path = os.path.join(CACHE_DIR, full_name.replace("/", "__") + f".{kind}.json")
+            try:
+                if time.time() - os.path.getmtime(path) < CACHE_TTL:
+                    with open(path, encoding="utf-8") as f:
+                        return json.load(f)
+            except (OSError, ValueError):
+                pass
+            ok, value = lookup(full_name)
+            if not ok:
+                return value
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            return value
+        return wrapper
+    return deco
+
+@disk_cached("repo")
 def get_repo(full_name):
     return gh_get(f"{GITHUB}/repos/{full_name}").json()
 
+@disk_cached("langs", on_error={})
 def get_langs(full_name):
     try:
         return gh_get(f"{GITHUB}/repos/{full_name}/languages").json()
-    except requests.HTTPError:
-        return {}
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return {}
+        raise  # transient failure: {} for the caller, but not cached
 
+@disk_cached("description", on_error=False, errors=Exception)
 def has_description(full_name):
     try:
         gh_get(f"{GITHUB}/repos/{full_name}/contents/DESCRIPTION")
         return True
-    except Exception:
-        return False
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return False
+        raise  # transient failure: False for the caller, but not cached
 
 def list_commits_2022(full_name, per_page=100, skip_merges=True):
     """Iterate commits in 2022 for a repo, optionally skipping merges."""
     since = "2022-01-01T00:00:00Z"
     until = "2022-12-31T23:59:59Z"
-    page = 1
-    while True:
+
+    def get_page(page):
+        if page > 1:
+            time.sleep(0.05)  # polite pause before each further listing page
         params = {"since": since, "until": until, "per_page": per_page, "page": page}
         # "application/vnd.github+json" is fine; we don't need the commit search preview headers
-        resp = gh_get(f"{GITHUB}/repos/{full_name}/commits", params=params)
-        items = resp.json()
-        if not items:
-            break
+        return gh_get(f"{GITHUB}/repos/{full_name}/commits", params=params).json()
+
+    # Repos are already screened --workers at a time, so keep one listing page in flight
+    # per repo: total concurrent listing requests stay at --workers.
+    for items in prefetch_pages(get_page, per_page, depth=1):
         for it in items:
             msg = ((it.get("commit") or {}).get("message") or "") if isinstance(it, dict) else ""
             if skip_merges and msg.startswith("Merge "):
                 continue
             yield it
-        if len(items) < per_page:
-            break
-        page += 1
-        time.sleep(0.05)
 
-def match_buglike(message, keywords):
+def compile_keywords(keywords):
+    # one alternation scanned in C instead of a substring test per keyword;
+    # keywords are already lowercased and matched against the lowered message
+    # (not re.I, whose case folding differs from str.lower for a few characters)
+    if not keywords:
+        return re.compile(r"$a")  # never matches, like any() over an empty list
+    return re.compile("|".join(map(re.escape, keywords)))
+
+def match_buglike(message, keyword_re):
     msg = (message or "").lower()
-    return any(kw in msg for kw in keywords)
+    return keyword_re.search(msg) is not None
+
+def screen_repo(full_name, entry, args, prefetched):
+    """Repo-level filters; returns the candidate row or None if the repo is dropped."""
+    try:
+        if full_name in prefetched:
+            meta, langs, desc = prefetched[full_name]
+            is_desc = desc if args.require_description else None
+        else:
+            meta = get_repo(full_name)
+            langs = get_langs(full_name)
+            is_desc = has_description(full_name) if args.require_description else None
+    except Exception as e:
+        log(f"[warn] Skipping {full_name}: {e}")
+        return None
+    finally:
+        if full_name not in prefetched:
+            time.sleep(0.1)
+
+    fork = bool(meta.get("fork", False))
+    archived = bool(meta.get("archived", False))
+    stars = int(meta.get("stargazers_count", 0))
+    pushed_at = meta.get("pushed_at")  # ISO8601 or None
+    html_url = meta.get("html_url", "")
+    topics = meta.get("topics") or []
+
+    # Basic filters
+    if fork or archived:
+        return None
+    if stars < args.stars_min:
+        return None
+    if args.require_r_bytes and (langs.get("R", 0) <= 0):
+        return None
+    if args.require_description and not is_desc:
+        return None
+
+    return {
+        "full_name": full_name,
+        "html_url": html_url,
+        "stars": stars,
+        "pushed_at": pushed_at,
+        "r_bytes": langs.get("R", 0),
+        "topics": ";".join(topics),
+        "reasons": "; ".join(sorted(entry.get("reasons", []))),
+    }
+
+def check_2022(rec, args, keyword_re):
+    """Count 2022 commits and bug-like messages for a screened repo; None if the scan fails."""
+    full_name = rec["full_name"]
+    total_2022 = 0
+    buglike_2022 = 0
+    updated_in_2022 = False
+
+    try:
+        for c in list_commits_2022(full_name, skip_merges=args.skip_merges):
+            total_2022 += 1
+            updated_in_2022 = True
+            msg = ((c.get("commit") or {}).get("message") or "")
+            if match_buglike(msg, keyword_re):
+                buglike_2022 += 1
+    except Exception as e:
+        log(f"[warn] Commits scan failed for {full_name}: {e}")
+        return None
+    finally:
+        time.sleep(0.05)
+
+    passes = (updated_in_2022 and
+              (total_2022 >= args.min_commits_2022) and
+              (buglike_2022 >= args.min_buglike_commits_2022))
+
+    return {
+        **rec,
+        "commits_2022": total_2022,
+        "buglike_2022": buglike_2022,
+        "buglike_share_2022": round((buglike_2022 / total_2022 * 100.0), 1) if total_2022 > 0 else 0.0,
+        "updated_in_2022": updated_in_2022,
+        "passes_thresholds": passes,
+    }
 
 def main():
     ap = argparse.ArgumentParser(description="Find R Markdown repos that meet 2022 activity/keyword conditions.")
@@ -144,9 +337,21 @@ def main():
     ap.add_argument("--keywords", type=str, default="fix, bug, bugfix, issue, error, crash, regression, hotfix, patch, revert, failing test, failure, broken")
     ap.add_argument("--only-from-file", type=str, default=None, help="CSV with a 'full_name' column; skip search and only screen these repos")
     ap.add_argument("--out", type=str, default="repos_rmd_2022_candidates.csv")
+    ap.add_argument("--cache-dir", type=str, default=None,
+                    help="Cache repo metadata/languages/DESCRIPTION lookups here across runs (default: off)")
+    ap.add_argument("--cache-ttl-hours", type=float, default=24.0)
+    ap.add_argument("--graphql-metadata", action="store_true",
+                    help=f"Fetch repo metadata, languages and DESCRIPTION presence via GraphQL, "
+                         f"{GRAPHQL_BATCH} repos per request (needs GITHUB_TOKEN; REST fallback per repo)")
+    ap.add_argument("--workers", type=int, default=4,
+                    help="Repos screened concurrently (default: 4; 1 = serial)")
     args = ap.parse_args()
 
+    global CACHE_DIR, CACHE_TTL
+    CACHE_DIR, CACHE_TTL = args.cache_dir, args.cache_ttl_hours * 3600
+
     keywords = [k.strip().lower() for k in args.keywords.split(",") if k.strip()]
+    keyword_re = compile_keywords(keywords)
 
     # Build the initial repo set
     repos = {}
@@ -193,87 +398,34 @@ def main():
                 break
         log(f"[info] Found {len(repos)} unique repos from code search (capped at {args.max_repos}).")
 
-    # Fetch metadata and apply repo-level filters
+    # Fetch metadata and apply repo-level filters (repos in parallel; map keeps the sorted order)
+    prefetched = {}
+    if args.graphql_metadata:
+        if TOKEN:
+            prefetched = get_repos_graphql(sorted(repos))
+            log(f"[info] GraphQL metadata for {len(prefetched)}/{len(repos)} repos.")
+        else:
+            log("[warn] --graphql-metadata needs GITHUB_TOKEN; using REST.")
     screened = []
-    for i, (full_name, entry) in enumerate(sorted(repos.items()), start=1):
-        try:
-            meta = get_repo(full_name)
-            langs = get_langs(full_name)
-            is_desc = has_description(full_name) if args.require_description else None
-        except Exception as e:
-            log(f"[warn] Skipping {full_name}: {e}")
-            continue
-
-        fork = bool(meta.get("fork", False))
-        archived = bool(meta.get("archived", False))
-        stars = int(meta.get("stargazers_count", 0))
-        pushed_at = meta.get("pushed_at")  # ISO8601 or None
-        html_url = meta.get("html_url", "")
-        topics = meta.get("topics") or []
-
-        # Basic filters
-        if fork or archived:
-            continue
-        if stars < args.stars_min:
-            continue
-        if args.require_r_bytes and (langs.get("R", 0) <= 0):
-            continue
-        if args.require_description and not is_desc:
-            continue
-
-        screened.append({
-            "full_name": full_name,
-            "html_url": html_url,
-            "stars": stars,
-            "pushed_at": pushed_at,
-            "r_bytes": langs.get("R", 0),
-            "topics": ";".join(topics),
-            "reasons": "; ".join(sorted(entry.get("reasons", []))),
-        })
-
-        if i % 50 == 0:
-            log(f"[info] Screened {i} repos...")
-
-        time.sleep(0.1)
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        results = pool.map(lambda kv: screen_repo(kv[0], kv[1], args, prefetched), sorted(repos.items()))
+        for i, rec in enumerate(results, start=1):
+            if rec is not None:
+                screened.append(rec)
+            if i % 50 == 0:
+                log(f"[info] Screened {i} repos...")
 
     log(f"[info] Repo-level screening passed: {len(screened)} repos. Checking 2022 commits...")
 
     # For each screened repo, enumerate 2022 commits and count bug-like messages
     out_rows = []
-    for j, rec in enumerate(screened, start=1):
-        full_name = rec["full_name"]
-        total_2022 = 0
-        buglike_2022 = 0
-        updated_in_2022 = False
-
-        try:
-            for c in list_commits_2022(full_name, skip_merges=args.skip_merges):
-                total_2022 += 1
-                updated_in_2022 = True
-                msg = ((c.get("commit") or {}).get("message") or "")
-                if match_buglike(msg, keywords):
-                    buglike_2022 += 1
-        except Exception as e:
-            log(f"[warn] Commits scan failed for {full_name}: {e}")
-            continue
-
-        passes = (updated_in_2022 and
-                  (total_2022 >= args.min_commits_2022) and
-                  (buglike_2022 >= args.min_buglike_commits_2022))
-
-        out_rows.append({
-            **rec,
-            "commits_2022": total_2022,
-            "buglike_2022": buglike_2022,
-            "buglike_share_2022": round((buglike_2022 / total_2022 * 100.0), 1) if total_2022 > 0 else 0.0,
-            "updated_in_2022": updated_in_2022,
-            "passes_thresholds": passes,
-        })
-
-        if j % 25 == 0:
-            log(f"[info] Checked 2022 activity for {j} repos...")
-
-        time.sleep(0.05)
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        results = pool.map(lambda rec: check_2022(rec, args, keyword_re), screened)
+        for j, row in enumerate(results, start=1):
+            if row is not None:
+                out_rows.append(row)
+            if j % 25 == 0:
+                log(f"[info] Checked 2022 activity for {j} repos...")
 
     # Save CSV
     out = args.out
@@ -0,0 +1,36 @@
+# gh_paging.py
+#
+# Paged GitHub listings, shared by fetch_bug_commits_all.py and find_rmd_repos_2022.py.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+LIST_PREFETCH = 4  # most listing pages requested ahead of the one being consumed
+
+def prefetch_pages(get_page, per_page, depth=LIST_PREFETCH):
+    """Yield get_page(1), get_page(2), ... in order; stops after an empty or short page.
+
+    Page N+1 is only requested once page N came back full, so a listing that fits on
+    one page costs one call. Every further full page lets one more request run ahead,
+    up to `depth`, so long listings overlap their waits while at most depth-1 requests
+    are spent past the end. An error on page N surfaces after pages 1..N-1 were yielded.
+    """
+    with ThreadPoolExecutor(max_workers=depth) as pool:
+        pending = deque([pool.submit(get_page, 1)])
+        next_page, ahead = 2, 0
+        try:
+            while True:
+                data = pending.popleft().result()
+                if not data:
+                    return
+                if len(data) >= per_page:
+                    ahead = min(ahead + 1, depth)
+                    while len(pending) < ahead:
+                        pending.append(pool.submit(get_page, next_page))
+                        next_page += 1
+                yield data
+                if len(data) < per_page:
+                    return
+        finally:
+            for fut in pending:
+                fut.cancel()
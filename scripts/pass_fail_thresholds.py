@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse, sys, os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
 # ---- thresholds (tune if needed)
@@ -13,7 +14,8 @@ def load_pct(base):
     return pd.read_csv(base + "_category_percentages.csv")
 
 def load_sus(base):
-    try:    return pd.read_csv(base + "_suspect_relabels.csv")
+    # only the row count is used; parse a single column
+    try:    return pd.read_csv(base + "_suspect_relabels.csv", usecols=[0])
     except: return pd.DataFrame()
 
 def load_touch(base):
@@ -39,8 +41,9 @@ def load_touch_r(base):
 
 
 def coverage_lowconf(classified_path):
+    # the classified CSV is by far the largest input; parse only the score column
     try:
-        df = pd.read_csv(classified_path)
+        df = pd.read_csv(classified_path, usecols=lambda c: c.lower() == "category_score")
     except Exception:
         return None, None
     lc = {c.lower(): c for c in df.columns}
@@ -53,10 +56,12 @@ def coverage_lowconf(classified_path):
     return cov, low
 
 def grade_repo(base, classified=None, show_tables=True):
-    pct = load_pct(base)
-    sus = load_sus(base)
-    touch = load_touch(base)
-    touch_r = load_touch_r(base)
+    # the inputs are independent files; read them concurrently (the C parser
+    # releases the GIL), so loading costs about as much as the largest one
+    with ThreadPoolExecutor(max_workers=5) as ex:
+        futs = [ex.submit(load, base) for load in (load_pct, load_sus, load_touch, load_touch_r)]
+        cov_fut = ex.submit(coverage_lowconf, classified) if classified else None
+        pct, sus, touch, touch_r = (f.result() for f in futs)
 
     n_commits = int(pd.to_numeric(pct["count"], errors="coerce").sum())
     unknown_pct = float(
@@ -64,9 +69,7 @@ def grade_repo(base, classified=None, show_tables=True):
     ) if "percent" in pct.columns else 0.0
     suspect_rate = (len(sus) / n_commits) if n_commits else 0.0
 
-    cov, low = (None, None)
-    if classified:
-        cov, low = coverage_lowconf(classified)
+    cov, low = cov_fut.result() if cov_fut else (None, None)
 
     status = "PASS"
     reasons = []
@@ -16,13 +16,14 @@ def main():
     args = ap.parse_args()
 
     df = pd.read_csv(args.inp)
+    df["bug_category"] = df["bug_category"].astype("category")  # group on integer codes
 
     # Expect columns: repo, bug_category, percent
     # If names differ, tweak here
     print("Columns:", df.columns.tolist())
 
     stats = (
-        df.groupby("bug_category")["percent"]
+        df.groupby("bug_category", observed=True)["percent"]
           .agg(["mean", "median", "min", "max", "std", "count"])
           .reset_index()
     )
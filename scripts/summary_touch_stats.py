@@ -10,21 +10,16 @@
 import argparse
 import pandas as pd
 
+STATS = ("mean", "median", "min", "max", "std", "count")
+
 def agg_stats(df, value_col, prefix):
-    g = (
-        df.groupby("bug_category")[value_col]
-          .agg(["mean", "median", "min", "max", "std", "count"])
+    # group on categorical codes rather than hashing the label strings;
+    # named aggregations produce the prefixed columns directly
+    return (
+        df.groupby(df["bug_category"].astype("category"), observed=True)
+          .agg(**{f"{prefix}_{op}": (value_col, op) for op in STATS})
           .reset_index()
     )
-    g = g.rename(columns={
-        "mean": f"{prefix}_mean",
-        "median": f"{prefix}_median",
-        "min": f"{prefix}_min",
-        "max": f"{prefix}_max",
-        "std": f"{prefix}_std",
-        "count": f"{prefix}_count",
-    })
-    return g
 
 def main():
     ap = argparse.ArgumentParser()